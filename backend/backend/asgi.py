@@ -0,0 +1,20 @@
+"""
+ASGI config for backend project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+django_application = get_asgi_application()
+
+from plays.asgi import PlayEventsRouter  # noqa: E402, needs the apps loaded by get_asgi_application()
+
+application = PlayEventsRouter(django_application)
@@ -0,0 +1,59 @@
+import time
+from unittest import TextTestResult
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TimedTextTestResult(TextTestResult):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = {}
+
+    def startTest(self, test):
+        self.durations[test.id()] = time.perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        self.durations[test.id()] = time.perf_counter() - self.durations[test.id()]
+        super().stopTest(test)
+
+
+class TimedTestRunner(DiscoverRunner):
+    # --slowest N lists the N slowest tests after the run; with --parallel, results are replayed in the main process
+    # once a worker is done, so there is nothing to time there.
+    def __init__(self, slowest=0, **kwargs):
+        super().__init__(**kwargs)
+        self.slowest = slowest
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--slowest', type=int, default=0, metavar='N', help='Report the N slowest tests.')
+
+    def setup_test_environment(self, **kwargs):
+        # Requests over their query budget fail the test that made them, instead of logging a warning nobody reads
+        super().setup_test_environment(**kwargs)
+        self.query_budget_strict = settings.QUERY_BUDGET_STRICT
+        settings.QUERY_BUDGET_STRICT = True
+
+    def teardown_test_environment(self, **kwargs):
+        settings.QUERY_BUDGET_STRICT = self.query_budget_strict
+        super().teardown_test_environment(**kwargs)
+
+    def get_resultclass(self):
+        return super().get_resultclass() or (TimedTextTestResult if self.slowest else None)
+
+    def run_suite(self, suite, **kwargs):
+        started = time.perf_counter()
+        result = super().run_suite(suite, **kwargs)
+
+        if self.slowest and isinstance(result, TimedTextTestResult) and self.parallel == 1:
+            durations = sorted(result.durations.items(), key=lambda item: item[1], reverse=True)
+
+            result.stream.writeln('Slowest tests:')
+            for test, duration in durations[:self.slowest]:
+                result.stream.writeln('{:>8.3f}s  {}'.format(duration, test))
+
+        result.stream.writeln('Suite wall clock: {:.3f}s'.format(time.perf_counter() - started))
+        return result
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'plays.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,10 +82,115 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Seconds a connection is reused across requests, instead of reopening (and re-tuning) one per request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        # A file backed test database, so concurrency tests get real sqlite3 locking instead of shared cache errors
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+        },
     }
 }
 
 
+# SQLite tuning applied to every new connection by plays.signals.tune_sqlite_connection.
+# 'production' lets readers run alongside the single writer (WAL) and makes writers wait for the lock instead of
+# failing with "database is locked"; 'default' keeps sqlite3's own settings.
+
+SQLITE_PRAGMA_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+SQLITE_PRAGMAS = SQLITE_PRAGMA_PROFILES[os.environ.get('SQLITE_PROFILE', 'production')]
+
+# Applied by manage.py seed while it bulk loads, then restored. Without synchronous writes a crash mid-load can corrupt
+# the database: only seed databases that can be thrown away.
+
+SQLITE_BULK_LOAD_PRAGMAS = {
+    'synchronous': 'OFF',
+    'cache_size': -256 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    # Responses stored for Idempotency-Key retries, and the keys of the requests in flight. Apart from the default
+    # cache, so a burst of cached plays never culls them before their timeout. Must be shared by every worker (a
+    # database, Redis or Memcached cache) once there is more than one: a retry may reach any of them.
+    'idempotency': {
+        'BACKEND': os.environ.get('IDEMPOTENCY_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('IDEMPOTENCY_CACHE_LOCATION', 'idempotency'),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('IDEMPOTENCY_CACHE_MAX_ENTRIES', 1000000))},
+    },
+}
+
+
+# Django REST framework
+# Money fields are exact Decimals, rendered as JSON numbers like the floats they replaced
+
+REST_FRAMEWORK = {
+    'COERCE_DECIMAL_TO_STRING': False,
+    # Renders like JSONRenderer, with orjson when it is installed
+    'DEFAULT_RENDERER_CLASSES': (
+        'plays.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'plays.throttling.TokenBucketThrottle',
+    ),
+    # Token buckets of plays.throttling.TokenBucketThrottle, per view throttle_scope: a burst of the whole rate, then
+    # the rate, per client address.
+    'DEFAULT_THROTTLE_RATES': {
+        'plays': os.environ.get('PLAYS_THROTTLE_RATE', '20/s'),
+        'reservations': os.environ.get('RESERVATIONS_THROTTLE_RATE', '10/s'),
+    },
+}
+
+# Buckets of clients idle long enough to refill are dropped; past THROTTLE_MAX_CLIENTS per scope, the least recently
+# seen clients are dropped too.
+
+THROTTLE_MAX_CLIENTS = int(os.environ.get('THROTTLE_MAX_CLIENTS', 100000))
+
+# Writes throttled by plays.throttling.WriteAdmissionMixin: at most WRITE_ADMISSION_LIMIT run at once (0 admits every
+# write), the others wait up to WRITE_ADMISSION_TIMEOUT seconds for a slot, then get a 503.
+
+WRITE_ADMISSION_LIMIT = int(os.environ.get('WRITE_ADMISSION_LIMIT', 8))
+WRITE_ADMISSION_TIMEOUT = float(os.environ.get('WRITE_ADMISSION_TIMEOUT', .5))
+
+
+# Play events
+# Fans reservation changes out to the server-sent events streams; brokers other than the in-process one share events
+# between workers.
+
+PLAY_EVENTS_BROKER = os.environ.get('PLAY_EVENTS_BROKER', 'plays.events.InProcessBroker')
+
+
+# Request metrics
+# Requests running more SQL queries than plays.settings.QUERY_BUDGETS allows are logged, or fail when strict.
+
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', '') == '1'
+
+
+# Tests
+# The runner makes query budgets strict for the whole run.
+
+TEST_RUNNER = 'backend.runner.TimedTestRunner'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 
@@ -106,9 +212,21 @@ AUTH_PASSWORD_VALIDATORS = [
 
 # Password Hash
 PASSWORD_HASHERS = [
-    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'plays.hashers.TunableArgon2PasswordHasher',
 ]
 
+ARGON2_PARAMS = {
+    'time_cost': int(os.environ.get('ARGON2_TIME_COST', 2)),
+    'memory_cost': int(os.environ.get('ARGON2_MEMORY_COST', 100 * 1024)),
+    'parallelism': int(os.environ.get('ARGON2_PARALLELISM', 8)),
+}
+
+# Signup hashes run on a pool of PASSWORD_HASHING_WORKERS threads (0 hashes on the request thread), bounding the CPU
+# and memory_cost a burst of signups takes. Signups waiting longer than PASSWORD_HASHING_TIMEOUT seconds get a 503.
+
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', 2))
+PASSWORD_HASHING_TIMEOUT = float(os.environ.get('PASSWORD_HASHING_TIMEOUT', 10))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.1/topics/i18n/
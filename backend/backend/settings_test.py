@@ -0,0 +1,17 @@
+"""
+Settings for the test suite:
+
+    python manage.py test --settings=backend.settings_test [--parallel] [--slowest 10]
+"""
+
+from .settings import *  # noqa: F401,F403
+
+
+# Tests check what gets hashed, not how slowly: the hasher tests pick the Argon2 hasher themselves
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+# An in-memory test database, cloned for every --parallel process. Tests that need sqlite3 file locking skip themselves.
+
+DATABASES = {'default': dict(DATABASES['default'], TEST={'NAME': None})}  # noqa: F405
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PlaysConfig(AppConfig):
     name = 'plays'
+
+    def ready(self):
+        from . import signals  # noqa: F401
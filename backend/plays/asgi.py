@@ -0,0 +1,83 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.urls import Resolver404, resolve
+
+from .events import KEEPALIVE, AsyncSubscription, format_event, get_broker, play_channel
+from .models import Play
+from .settings import PLAY_EVENTS_HEARTBEAT
+from .views import EVENT_STREAM_HEADERS, load_play_snapshot
+
+
+class PlayEventsRouter:
+    # Django 3.2 iterates streaming responses synchronously on the event loop, so the play-events streams are served
+    # here instead, waiting on their subscription without a thread. Every other request goes to Django.
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        play_uuid = self.resolve_play_events(scope)
+
+        if play_uuid is None:
+            return await self.application(scope, receive, send)
+
+        await stream_play_events(play_uuid, receive, send)
+
+    def resolve_play_events(self, scope):
+        if scope['type'] != 'http' or scope['method'] != 'GET':
+            return None
+
+        try:
+            match = resolve(scope['path'])
+        except Resolver404:
+            return None
+
+        return match.kwargs['pk'] if match.url_name == 'play-events' else None
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream_play_events(play_uuid, receive, send):
+    broker = get_broker()
+    channel = play_channel(play_uuid)
+    subscription = AsyncSubscription()
+
+    # Subscribed before reading the snapshot, so no change falls in between
+    broker.subscribe(channel, subscription)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+
+    try:
+        try:
+            snapshot = await sync_to_async(load_play_snapshot)(play_uuid)
+        except Play.DoesNotExist:
+            await send({'type': 'http.response.start', 'status': 404,
+                        'headers': [(b'content-type', b'application/json')]})
+            await send({'type': 'http.response.body', 'body': b'{"detail":"Not found."}'})
+            return
+
+        headers = [(b'content-type', b'text/event-stream')] + [
+            (header.lower().encode(), value.encode()) for header, value in EVENT_STREAM_HEADERS.items()]
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': format_event('snapshot', snapshot), 'more_body': True})
+
+        while not subscription.overflowed:
+            next_event = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait({next_event, disconnected}, timeout=PLAY_EVENTS_HEARTBEAT,
+                                         return_when=asyncio.FIRST_COMPLETED)
+
+            if next_event not in done:
+                next_event.cancel()
+
+            if disconnected in done:
+                return
+
+            body = format_event('availability', next_event.result()) if next_event in done else KEEPALIVE
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+
+        await send({'type': 'http.response.body'})
+    finally:
+        disconnected.cancel()
+        broker.unsubscribe(channel, subscription)
@@ -0,0 +1,122 @@
+import time
+from threading import Barrier, Lock, Thread
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from .metrics import QueryCounter
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.
+
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def without_throttling():
+    # Every benchmark client shares one address: rate limits and write admission would measure how fast requests are
+    # turned away, not how fast they are served. Without rates, the throttles let every request through (the throttle
+    # classes of views are set when they are defined).
+    return override_settings(REST_FRAMEWORK=dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={}),
+                             WRITE_ADMISSION_LIMIT=0)
+
+
+def run_endpoint(send_request, amount_of_requests, concurrency):
+    # send_request(client, index) is called amount_of_requests times, spread over threads with their own connection
+    latencies = []
+    query_counts = []
+    status_codes = {}
+    lock = Lock()
+    next_index = iter(range(amount_of_requests))
+    barrier = Barrier(concurrency)
+
+    def worker():
+        client = Client()
+        # Opening (and tuning) the connection is not part of any request
+        connection.ensure_connection()
+        barrier.wait()
+
+        try:
+            while True:
+                with lock:
+                    index = next(next_index, None)
+
+                if index is None:
+                    return
+
+                query_counter = QueryCounter()
+                started = time.perf_counter()
+
+                with connection.execute_wrapper(query_counter):
+                    response = send_request(client, index)
+
+                latency = time.perf_counter() - started
+
+                with lock:
+                    latencies.append(latency)
+                    query_counts.append(query_counter.count)
+                    status_codes[response.status_code] = status_codes.get(response.status_code, 0) + 1
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    threads = [Thread(target=worker) for _ in range(concurrency)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'requests_per_second': len(latencies) / elapsed if elapsed else 0.,
+        'status_codes': {str(code): amount for code, amount in sorted(status_codes.items())},
+        'latency_ms': {
+            'mean': 1000 * sum(latencies) / len(latencies) if latencies else 0.,
+            'p50': 1000 * percentile(latencies, .50),
+            'p90': 1000 * percentile(latencies, .90),
+            'p99': 1000 * percentile(latencies, .99),
+            'max': 1000 * (latencies[-1] if latencies else 0.),
+        },
+        'queries': {
+            'mean': sum(query_counts) / len(query_counts) if query_counts else 0.,
+            'max': max(query_counts, default=0),
+        },
+    }
+
+
+def compare_reports(baseline, current, tolerance):
+    # An endpoint regresses when its p99 grows more than tolerance (a fraction) or it runs more queries per request
+    lines = []
+    regressions = []
+
+    for endpoint, result in current['endpoints'].items():
+        baseline_result = baseline['endpoints'].get(endpoint)
+
+        if baseline_result is None:
+            lines.append('{:<20} new endpoint'.format(endpoint))
+            continue
+
+        baseline_p99 = baseline_result['latency_ms']['p99']
+        p99 = result['latency_ms']['p99']
+        p99_change = (p99 - baseline_p99) / baseline_p99 if baseline_p99 else 0.
+        rps_change = (result['requests_per_second'] - baseline_result['requests_per_second']) / (
+            baseline_result['requests_per_second'] or 1.)
+        queries_change = result['queries']['max'] - baseline_result['queries']['max']
+
+        lines.append('{:<20} p99 {:>8.2f}ms ({:+.1%})  req/s {:>8.1f} ({:+.1%})  max queries {} ({:+d})'.format(
+            endpoint, p99, p99_change, result['requests_per_second'], rps_change, result['queries']['max'],
+            queries_change))
+
+        if p99_change > tolerance or queries_change > 0:
+            regressions.append(endpoint)
+
+    return lines, regressions
@@ -0,0 +1,51 @@
+import json
+from hashlib import md5
+from uuid import uuid4
+
+from django.core.cache import caches
+from rest_framework.utils.encoders import JSONEncoder
+
+from .settings import PLAY_CACHE_ALIAS, PLAY_CACHE_TIMEOUT
+
+
+def play_version_key(play_uuid):
+    return 'plays:play-version:{}'.format(play_uuid)
+
+
+def play_financials_key(play_uuid, version):
+    return 'plays:play-financials:{}:{}'.format(play_uuid, version)
+
+
+def get_play_version(play_uuid):
+    cache = caches[PLAY_CACHE_ALIAS]
+    version = cache.get(play_version_key(play_uuid))
+
+    if version is None:
+        version = uuid4().hex
+
+        if not cache.add(play_version_key(play_uuid), version, PLAY_CACHE_TIMEOUT):
+            version = cache.get(play_version_key(play_uuid), version)
+
+    return version
+
+
+def get_or_cache_play_financials(play_uuid, serialize):
+    # (data, etag) of the play detail response, serialize() called on a miss. Entries are keyed by the play's version,
+    # read before serializing: a write committed meanwhile replaces the version, so a miss that read the old counters
+    # stores under a key nobody reads anymore, instead of over the invalidation.
+    cache = caches[PLAY_CACHE_ALIAS]
+    key = play_financials_key(play_uuid, get_play_version(play_uuid))
+    cached = cache.get(key)
+
+    if cached is None:
+        data = dict(serialize())
+        etag = '"{}"'.format(md5(json.dumps(data, sort_keys=True, cls=JSONEncoder).encode()).hexdigest())
+        cached = (data, etag)
+
+        cache.set(key, cached, PLAY_CACHE_TIMEOUT)
+
+    return cached
+
+
+def invalidate_play_financials(play_uuid):
+    caches[PLAY_CACHE_ALIAS].set(play_version_key(play_uuid), uuid4().hex, PLAY_CACHE_TIMEOUT)
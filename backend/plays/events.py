@@ -0,0 +1,109 @@
+import asyncio
+import json
+import queue
+from collections import defaultdict
+from threading import Lock
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .settings import PLAY_EVENTS_QUEUE_SIZE
+
+
+class Subscription:
+    # Blocking side of a subscriber, for streams served by a thread (WSGI)
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=PLAY_EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # A subscriber too slow to keep up is dropped, it gets a fresh snapshot when it reconnects
+            self.overflowed = True
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription:
+    # Event loop side of a subscriber, for streams served by backend/asgi.py; put() may be called from any thread
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=PLAY_EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, event):
+        self.loop.call_soon_threadsafe(self.put_nowait, event)
+
+    def put_nowait(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class InProcessBroker:
+    # Fans events out to the subscribers of this process. Brokers shared by several workers (e.g. over Redis pub/sub)
+    # implement the same four methods and are picked with settings.PLAY_EVENTS_BROKER.
+    def __init__(self):
+        self.lock = Lock()
+        self.subscriptions = defaultdict(set)
+
+    def subscribe(self, channel, subscription):
+        with self.lock:
+            self.subscriptions[channel].add(subscription)
+
+    def unsubscribe(self, channel, subscription):
+        with self.lock:
+            self.subscriptions[channel].discard(subscription)
+
+            if not self.subscriptions[channel]:
+                del self.subscriptions[channel]
+
+    def has_subscribers(self, channel):
+        with self.lock:
+            return channel in self.subscriptions
+
+    def publish(self, channel, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+_broker = None
+_broker_lock = Lock()
+
+
+def get_broker():
+    global _broker
+
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.PLAY_EVENTS_BROKER)()
+
+        return _broker
+
+
+def reset_broker():
+    global _broker
+
+    with _broker_lock:
+        _broker = None
+
+
+def play_channel(play_uuid):
+    return 'plays:play-events:{}'.format(play_uuid)
+
+
+def format_event(name, data):
+    return 'event: {}\ndata: {}\n\n'.format(name, json.dumps(data)).encode()
+
+
+KEEPALIVE = b': keepalive\n\n'
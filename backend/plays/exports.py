@@ -0,0 +1,59 @@
+import csv
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Play, Reservation
+from .money import from_basis_points, from_cents
+from .settings import EXPORT_CHUNK_SIZE
+
+
+RESERVATION_EXPORT_FIELDS = ('uuid', 'attendee', 'play', 'seat', 'created_at')
+
+PLAY_FINANCIAL_EXPORT_FIELDS = ('uuid', 'name', 'fee', 'price', 'total_accents',
+                                'amount_of_reserved_accents', 'amount_of_available_accents', 'revenue', 'total_fee')
+
+
+def reservation_rows():
+    reservations = Reservation.objects.order_by('created_at', 'uuid').values_list(
+        'uuid', 'attendee_id', 'play_id', 'seat', 'created_at')
+
+    for uuid, attendee_uuid, play_uuid, seat, created_at in reservations.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield str(uuid), str(attendee_uuid), str(play_uuid), seat, created_at.isoformat()
+
+
+def play_financial_rows():
+    plays = Play.objects.with_financials().order_by('created_at', 'uuid').values_list(
+        'uuid', 'name', 'fee_basis_points', 'price_cents', 'total_accents', 'reserved_accents', 'held_accents',
+        'revenue_cents', 'total_fee_cents')
+
+    for (uuid, name, fee_basis_points, price_cents, total_accents, reserved_accents, held_accents, revenue_cents,
+         total_fee_cents) in plays.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield (str(uuid), name, from_basis_points(fee_basis_points), from_cents(price_cents), total_accents,
+               reserved_accents, total_accents - reserved_accents - held_accents, from_cents(revenue_cents),
+               from_cents(total_fee_cents))
+
+
+def render_ndjson(fields, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), cls=JSONEncoder) + '\n'
+
+
+class _EchoBuffer:
+    def write(self, value):
+        return value
+
+
+def render_csv(fields, rows):
+    writer = csv.writer(_EchoBuffer())
+
+    yield writer.writerow(fields)
+
+    for row in rows:
+        yield writer.writerow(row)
+
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', render_ndjson),
+    'csv': ('text/csv', render_csv),
+}
@@ -0,0 +1,41 @@
+from django.db import models
+from rest_framework.fields import BooleanField, CharField, UUIDField
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.serializers import Serializer
+
+
+class PlayFilter(Serializer):
+    name = CharField(required=False, max_length=100)
+    available = BooleanField(required=False)
+
+    def filter_queryset(self, queryset):
+        if 'name' in self.validated_data:
+            queryset = queryset.filter(name__istartswith=self.validated_data['name'])
+
+        # Accents held by seat holds are not available either
+        unheld_accents = models.F('total_accents') - models.F('held_accents')
+
+        if self.validated_data.get('available') is True:
+            queryset = queryset.filter(reserved_accents__lt=unheld_accents)
+        elif self.validated_data.get('available') is False:
+            queryset = queryset.filter(reserved_accents__gte=unheld_accents)
+
+        return queryset
+
+
+class ReservationFilter(Serializer):
+    # Both lead a (column, created_at, uuid) index, so a filtered cursor page is still a single index range scan
+    play = UUIDField(required=False)
+    attendee = UUIDField(required=False)
+
+    def filter_queryset(self, queryset):
+        return queryset.filter(**self.validated_data)
+
+
+class QueryParamsFilterBackend(BaseFilterBackend):
+    # Validates the query string with the view's filter_class; a bad value is a 400, not an empty page
+    def filter_queryset(self, request, queryset, view):
+        # A plain dict: as a QueryDict, a missing boolean would read as an unchecked checkbox, i.e. False
+        filters = view.filter_class(data=request.query_params.dict())
+        filters.is_valid(raise_exception=True)
+        return filters.filter_queryset(queryset)
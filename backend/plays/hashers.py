@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, make_password
+
+
+class TunableArgon2PasswordHasher(Argon2PasswordHasher):
+    # Same 'argon2' algorithm, costs read from settings.ARGON2_PARAMS; hashes with other costs get upgraded on login
+    @property
+    def time_cost(self):
+        return settings.ARGON2_PARAMS['time_cost']
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_PARAMS['memory_cost']
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARAMS['parallelism']
+
+
+class PasswordHashingBusy(Exception):
+    pass
+
+
+_pool = None
+_pool_lock = Lock()
+
+
+def get_hashing_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is None and settings.PASSWORD_HASHING_WORKERS:
+            _pool = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASHING_WORKERS,
+                                       thread_name_prefix='password-hashing')
+
+        return _pool
+
+
+def reset_hashing_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+
+        _pool = None
+
+
+def hash_password(raw_password):
+    # At most PASSWORD_HASHING_WORKERS hashes (and their memory_cost) run at once, the others wait for a worker
+    pool = get_hashing_pool()
+
+    if pool is None:
+        return make_password(raw_password)
+
+    future = pool.submit(make_password, raw_password)
+
+    try:
+        return future.result(timeout=settings.PASSWORD_HASHING_TIMEOUT)
+    except TimeoutError:
+        future.cancel()
+        raise PasswordHashingBusy()
@@ -0,0 +1,72 @@
+from hashlib import sha256
+
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from .settings import (
+    IDEMPOTENCY_CACHE_ALIAS, IDEMPOTENCY_KEY_MAX_LENGTH, IDEMPOTENCY_KEY_TIMEOUT, IDEMPOTENCY_LOCK_TIMEOUT
+)
+
+
+# Outcomes a retry may change: they are not replayed, the request runs again
+RETRYABLE_STATUS_CODES = (status.HTTP_409_CONFLICT, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+def idempotency_key(path, key):
+    return 'plays:idempotency:{}:{}'.format(path, sha256(key.encode()).hexdigest())
+
+
+def is_replayable(status_code):
+    return status_code < 500 and status_code not in RETRYABLE_STATUS_CODES
+
+
+class IdempotentCreateMixin:
+    # A POST with an Idempotency-Key header runs once: retries with the same key and body get the stored response,
+    # without validating, hashing or writing again. The key is held while the first request runs, so a concurrent
+    # retry gets a 409 rather than running it twice.
+    def post(self, request, *args, **kwargs):
+        key = request.META.get('HTTP_IDEMPOTENCY_KEY')
+
+        if key is None:
+            return super().post(request, *args, **kwargs)
+
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response({'detail': 'Idempotency-Key must have 1 to {} characters.'.format(
+                IDEMPOTENCY_KEY_MAX_LENGTH)}, status=status.HTTP_400_BAD_REQUEST)
+
+        cache = caches[IDEMPOTENCY_CACHE_ALIAS]
+        cache_key = idempotency_key(request.path, key)
+        fingerprint = sha256(request.body).hexdigest()
+
+        if not cache.add(cache_key, {'fingerprint': fingerprint}, IDEMPOTENCY_LOCK_TIMEOUT):
+            return self.replay(cache.get(cache_key), fingerprint)
+
+        try:
+            response = super().post(request, *args, **kwargs)
+        except Exception as exception:
+            # Validation errors and other API exceptions are outcomes too, anything else propagates
+            try:
+                response = self.handle_exception(exception)
+            except Exception:
+                cache.delete(cache_key)
+                raise
+
+        if is_replayable(response.status_code):
+            cache.set(cache_key, {'fingerprint': fingerprint, 'status': response.status_code, 'data': response.data},
+                      IDEMPOTENCY_KEY_TIMEOUT)
+        else:
+            cache.delete(cache_key)
+
+        return response
+
+    def replay(self, stored, fingerprint):
+        if stored is not None and stored['fingerprint'] != fingerprint:
+            return Response({'detail': 'This Idempotency-Key was already used with another request body.'},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        if stored is None or 'status' not in stored:
+            return Response({'detail': 'A request with this Idempotency-Key is in progress, try again later.'},
+                            status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+
+        return Response(stored['data'], status=stored['status'], headers={'Idempotent-Replayed': 'true'})
@@ -0,0 +1,122 @@
+import json
+import platform
+import random
+import sys
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from ...benchmarks import compare_reports, run_endpoint, without_throttling
+from ...seeding import seed_dataset
+
+
+class Command(BaseCommand):
+    help = ('Seeds a scratch test database and drives the plays, attendees and reservations endpoints concurrently, '
+            'writing a JSON report with latency percentiles and query counts per endpoint.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plays', type=int, default=100)
+        parser.add_argument('--attendees', type=int, default=10000)
+        parser.add_argument('--reservations-per-play', type=int, default=100)
+        parser.add_argument('--seats-per-play', type=int,
+                            help='Seats of every play; by default its reservations plus what the run books on it.')
+        parser.add_argument('--requests', type=int, default=500, help='Requests sent to each endpoint.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--output', help='Where to write the JSON report, stdout by default.')
+        parser.add_argument('--baseline', help='A previous JSON report to compare this run against.')
+        parser.add_argument('--tolerance', type=float, default=.2,
+                            help='Allowed p99 latency growth over the baseline, as a fraction.')
+
+    def handle(self, *args, **options):
+        if options['reservations_per_play'] >= options['attendees']:
+            raise CommandError('--attendees must be greater than --reservations-per-play, '
+                               'so there are attendees left to book during the run.')
+
+        # Never touch the configured database: run against a throwaway test database, like the test runner does
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        try:
+            with without_throttling():
+                report = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        serialized_report = json.dumps(report, indent=2, sort_keys=True)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(serialized_report + '\n')
+        else:
+            self.stdout.write(serialized_report)
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+
+            lines, regressions = compare_reports(baseline, report, options['tolerance'])
+
+            for line in lines:
+                self.stderr.write(line)
+
+            if regressions:
+                raise CommandError('Regressed endpoints: ' + ', '.join(regressions))
+
+    def run(self, options):
+        seats_per_play = options['seats_per_play']
+
+        if seats_per_play is None:
+            # The reservations the run creates are spread over the plays
+            seats_per_play = options['reservations_per_play'] + -(-options['requests'] // options['plays'])
+
+        dataset = seed_dataset(options['plays'], options['attendees'], options['reservations_per_play'],
+                               seats_per_play=seats_per_play)
+        attendee_uuids = dataset.attendee_uuids
+        play_uuids = dataset.play_uuids
+
+        def unreserved_pair(index):
+            # Seeding booked attendees play_index .. play_index + reservations_per_play - 1 of every play
+            play_index = index % len(play_uuids)
+            attendee_index = play_index + dataset.reservations_per_play + index // len(play_uuids)
+            return attendee_uuids[attendee_index % len(attendee_uuids)], play_uuids[play_index]
+
+        def create_reservation(client, index):
+            attendee_uuid, play_uuid = unreserved_pair(index)
+            return client.post('/api/reservations/', data={'attendee': str(attendee_uuid), 'play': str(play_uuid)},
+                               content_type='application/json')
+
+        endpoints = {
+            'play-list': lambda client, index: client.get('/api/plays/'),
+            'play-detail': lambda client, index: client.get('/api/plays/{}/'.format(random.choice(play_uuids))),
+            'user-list': lambda client, index: client.get('/api/attendees/'),
+            'user-detail': lambda client, index: client.get(
+                '/api/attendees/{}/'.format(random.choice(attendee_uuids))),
+            'reservation-list': lambda client, index: client.get('/api/reservations/'),
+            'reservation-create': create_reservation,
+        }
+
+        results = {}
+
+        for name, send_request in endpoints.items():
+            self.stderr.write('Benchmarking {}...'.format(name))
+            results[name] = run_endpoint(send_request, options['requests'], options['concurrency'])
+
+        return {
+            'meta': {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'python': sys.version.split()[0],
+                'django': django.get_version(),
+                'platform': platform.platform(),
+                'dataset': {
+                    'plays': options['plays'],
+                    'attendees': options['attendees'],
+                    'reservations_per_play': options['reservations_per_play'],
+                    'seats_per_play': dataset.seats_per_play,
+                },
+            },
+            'endpoints': results,
+        }
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import time
+from threading import BoundedSemaphore, Thread
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from ...benchmarks import percentile, without_throttling
+from ...seeding import seed_dataset
+
+
+class Command(BaseCommand):
+    help = ('Polls play details from many concurrent connections on a scratch test database, through the sync DRF '
+            'views behind a fixed number of WSGI worker threads and through the async views on a single event loop.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', default='8,64,256',
+                            help='Comma separated amounts of concurrent polling connections.')
+        parser.add_argument('--polls', type=int, default=20, help='Requests sent by each connection.')
+        parser.add_argument('--threads', type=int, default=8, help='Worker threads of the WSGI mode.')
+        parser.add_argument('--plays', type=int, default=100)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        try:
+            play_uuids = seed_dataset(options['plays'], amount_of_attendees=1, reservations_per_play=0).play_uuids
+            report = {}
+
+            with without_throttling():
+                for connections in [int(connections) for connections in options['connections'].split(',')]:
+                    report[connections] = {
+                        'wsgi': self.run_wsgi(play_uuids, connections, options['polls'], options['threads']),
+                        'asgi': self.run_asgi(play_uuids, connections, options['polls']),
+                    }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        line = 'connections {:>5}  {}  {:>8.1f} req/s  p50 {:>8.2f}ms  p99 {:>8.2f}ms'
+
+        for connections, modes in report.items():
+            for mode, result in modes.items():
+                self.stderr.write(line.format(connections, mode, result['requests_per_second'],
+                                              result['latency_ms']['p50'], result['latency_ms']['p99']))
+
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+
+    def run_wsgi(self, play_uuids, connections, polls, threads):
+        # A connection waits for one of the worker threads for every request, like behind a threaded WSGI server
+        workers = BoundedSemaphore(threads)
+        latencies = []
+
+        def poll(index):
+            client = Client()
+            url = '/api/plays/{}/'.format(play_uuids[index % len(play_uuids)])
+
+            try:
+                for _ in range(polls):
+                    started = time.perf_counter()
+
+                    with workers:
+                        client.get(url)
+
+                    latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        pollers = [Thread(target=poll, args=(index, )) for index in range(connections)]
+        started = time.perf_counter()
+
+        for poller in pollers:
+            poller.start()
+
+        for poller in pollers:
+            poller.join()
+
+        return self.summarize(latencies, time.perf_counter() - started)
+
+    def run_asgi(self, play_uuids, connections, polls):
+        latencies = []
+
+        async def poll(index):
+            client = AsyncClient()
+            url = '/api/async/plays/{}/'.format(play_uuids[index % len(play_uuids)])
+
+            for _ in range(polls):
+                started = time.perf_counter()
+                await client.get(url)
+                latencies.append(time.perf_counter() - started)
+
+        async def run():
+            await asyncio.gather(*(poll(index) for index in range(connections)))
+
+        started = time.perf_counter()
+        asyncio.run(run())
+
+        return self.summarize(latencies, time.perf_counter() - started)
+
+    def summarize(self, latencies, elapsed):
+        latencies.sort()
+
+        return {
+            'requests': len(latencies),
+            'requests_per_second': len(latencies) / elapsed if elapsed else 0.,
+            'latency_ms': {
+                'p50': 1000 * percentile(latencies, .50),
+                'p99': 1000 * percentile(latencies, .99),
+            },
+        }
@@ -0,0 +1,60 @@
+import time
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from ... import renderers
+from ...models import Play, Reservation
+from ...renderers import FastJSONRenderer
+from ...serializers import PlaySerializer, PlayValuesSerializer, ReservationSerializer, ReservationValuesSerializer
+
+
+class Command(BaseCommand):
+    help = ('Times rendering a list page of plays and of reservations, from model instances through the model '
+            'serializers and JSONRenderer versus from .values() rows through the values serializers and '
+            'FastJSONRenderer. No database involved: rows are built in memory.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20, help='Best of this many runs is reported.')
+
+    def handle(self, *args, **options):
+        self.stderr.write('orjson {}'.format('installed' if renderers.orjson is not None else 'not installed'))
+
+        plays = [Play(uuid=uuid4(), name='Play #{}'.format(index), fee_basis_points=1355, price_cents=1999 + index,
+                      total_accents=30 + index) for index in range(options['rows'])]
+        reservations = [Reservation(uuid=uuid4(), attendee_id=uuid4(), play_id=play.uuid, seat=index % 30)
+                        for index, play in enumerate(plays)]
+
+        self.compare('plays', options, lambda: PlaySerializer(plays, many=True).data, PlayValuesSerializer(),
+                     [{column: getattr(play, column) for column in PlayValuesSerializer().columns} for play in plays])
+        self.compare('reservations', options, lambda: ReservationSerializer(reservations, many=True).data,
+                     ReservationValuesSerializer(),
+                     [{'uuid': reservation.uuid, 'attendee': reservation.attendee_id, 'play': reservation.play_id,
+                       'seat': reservation.seat} for reservation in reservations])
+
+    def compare(self, name, options, serialize_instances, values_serializer, rows):
+        paths = (
+            ('serializer + JSONRenderer', lambda: JSONRenderer().render(serialize_instances())),
+            ('values + JSONRenderer', lambda: JSONRenderer().render(values_serializer.to_representation(rows))),
+            ('values + FastJSONRenderer', lambda: FastJSONRenderer().render(values_serializer.to_representation(rows))),
+        )
+
+        outputs = {render() for _, render in paths}
+        if len(outputs) != 1:
+            raise CommandError('The {} serialization paths render different bytes.'.format(name))
+
+        baseline = None
+
+        for path, render in paths:
+            elapsed = min(self.time(render) for _ in range(options['repeat']))
+            baseline = baseline or elapsed
+
+            self.stdout.write('{:<12} {:<26} {:>9.2f}ms  {:>7.2f}us/row  x{:.1f}'.format(
+                name, path, elapsed * 1000, elapsed * 10 ** 6 / len(rows), baseline / elapsed))
+
+    def time(self, render):
+        started = time.perf_counter()
+        render()
+        return time.perf_counter() - started
@@ -0,0 +1,89 @@
+import json
+from threading import Thread
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from ...benchmarks import run_endpoint, without_throttling
+from ...seeding import seed_dataset
+
+
+class Command(BaseCommand):
+    help = ('Drives signups and reservations at the same time on a scratch test database, once per password hashing '
+            'pool size, reporting how a signup burst affects reservation throughput.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='0,2',
+                            help='Comma separated PASSWORD_HASHING_WORKERS to compare, 0 hashes on the request thread.')
+        parser.add_argument('--signups', type=int, default=64)
+        parser.add_argument('--signup-concurrency', type=int, default=16)
+        parser.add_argument('--reservations', type=int, default=1000)
+        parser.add_argument('--reservation-concurrency', type=int, default=4)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        try:
+            report = {}
+
+            for workers in [int(workers) for workers in options['workers'].split(',')]:
+                self.stderr.write('Benchmarking PASSWORD_HASHING_WORKERS={}...'.format(workers))
+
+                with override_settings(PASSWORD_HASHING_WORKERS=workers, PASSWORD_HASHING_TIMEOUT=60), \
+                        without_throttling():
+                    report[workers] = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        line = 'workers {:>2}  reservations {:>8.1f} req/s p99 {:>8.2f}ms  signups {:>6.1f} req/s p99 {:>8.2f}ms'
+
+        for workers, results in report.items():
+            reservations, signups = results['reservation-create'], results['user-create']
+            self.stderr.write(line.format(
+                workers, reservations['requests_per_second'], reservations['latency_ms']['p99'],
+                signups['requests_per_second'], signups['latency_ms']['p99']))
+
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+
+    def run(self, options):
+        dataset = seed_dataset(amount_of_plays=1, amount_of_attendees=options['reservations'], reservations_per_play=0,
+                               seats_per_play=options['reservations'])
+        prefix = uuid4().hex[:8]
+
+        def create_attendee(client, index):
+            return client.post('/api/attendees/', data={
+                'username': '{}-signup-{}'.format(prefix, index),
+                'email': '{}.signup.{}@host.com'.format(prefix, index),
+                'password': 'xoriugui',
+            })
+
+        def create_reservation(client, index):
+            return client.post('/api/reservations/', data={
+                'attendee': str(dataset.attendee_uuids[index]),
+                'play': str(dataset.play_uuids[0]),
+            }, content_type='application/json')
+
+        workloads = {
+            'user-create': (create_attendee, options['signups'], options['signup_concurrency']),
+            'reservation-create': (create_reservation, options['reservations'], options['reservation_concurrency']),
+        }
+        results = {}
+
+        def run_workload(name):
+            send_request, amount, concurrency = workloads[name]
+            results[name] = run_endpoint(send_request, amount, concurrency)
+
+        # Both workloads share the process, like the threads of a single WSGI worker
+        threads = [Thread(target=run_workload, args=(name, )) for name in workloads]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        return results
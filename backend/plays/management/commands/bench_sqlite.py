@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import tempfile
+import time
+from threading import Barrier, Thread
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...benchmarks import percentile
+
+
+SCHEMA = (
+    'CREATE TABLE play (uuid TEXT PRIMARY KEY, total_accents INTEGER NOT NULL, reserved_accents INTEGER NOT NULL)',
+    'CREATE TABLE reservation (uuid TEXT PRIMARY KEY, play_uuid TEXT NOT NULL REFERENCES play (uuid), '
+    'attendee TEXT NOT NULL, UNIQUE (play_uuid, attendee))',
+)
+
+
+class Command(BaseCommand):
+    help = ('Compares reservation throughput of the SQLite pragma profiles in settings.SQLITE_PRAGMA_PROFILES, '
+            'with mixed concurrent writers and readers on a scratch database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.)
+        parser.add_argument('--plays', type=int, default=50)
+
+    def handle(self, *args, **options):
+        for profile, pragmas in settings.SQLITE_PRAGMA_PROFILES.items():
+            # Only tuned profiles keep their connection open, like CONN_MAX_AGE does for requests
+            persistent = bool(pragmas)
+            result = self.run_profile(pragmas, persistent, options)
+
+            self.stdout.write(
+                '{profile:<12} writes/s {writes:>9.1f}  reads/s {reads:>9.1f}  '
+                'write p99 {write_p99:>7.2f}ms  locked errors {errors}'.format(profile=profile, **result))
+
+    def run_profile(self, pragmas, persistent, options):
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, 'bench.sqlite3')
+            play_uuids = self.create_database(database, options['plays'])
+
+            deadline = [None]
+            barrier = Barrier(options['writers'] + options['readers'],
+                              action=lambda: deadline.__setitem__(0, time.perf_counter() + options['seconds']))
+            write_latencies = []
+            read_count = [0]
+            errors = [0]
+
+            def connect():
+                connection = sqlite3.connect(database, isolation_level=None)
+
+                for pragma, value in pragmas.items():
+                    connection.execute('PRAGMA {} = {}'.format(pragma, value))
+
+                return connection
+
+            def write(index):
+                connection = connect() if persistent else None
+                barrier.wait()
+
+                while time.perf_counter() < deadline[0]:
+                    current = connection or connect()
+                    play_uuid = play_uuids[index % len(play_uuids)]
+                    index += 1
+                    started = time.perf_counter()
+
+                    try:
+                        current.execute('BEGIN')
+                        current.execute('UPDATE play SET reserved_accents = reserved_accents + 1 WHERE uuid = ? '
+                                        'AND reserved_accents < total_accents', (play_uuid, ))
+                        current.execute('INSERT INTO reservation VALUES (?, ?, ?)',
+                                        (uuid4().hex, play_uuid, uuid4().hex))
+                        current.execute('COMMIT')
+                        write_latencies.append(time.perf_counter() - started)
+                    except sqlite3.OperationalError:
+                        errors[0] += 1
+                        if current.in_transaction:
+                            current.execute('ROLLBACK')
+                    finally:
+                        if connection is None:
+                            current.close()
+
+            def read(index):
+                connection = connect() if persistent else None
+                barrier.wait()
+
+                while time.perf_counter() < deadline[0]:
+                    current = connection or connect()
+
+                    try:
+                        current.execute('SELECT total_accents - reserved_accents FROM play WHERE uuid = ?',
+                                        (play_uuids[index % len(play_uuids)], )).fetchone()
+                        read_count[0] += 1
+                    except sqlite3.OperationalError:
+                        errors[0] += 1
+                    finally:
+                        if connection is None:
+                            current.close()
+
+                    index += 1
+
+            threads = ([Thread(target=write, args=(index, )) for index in range(options['writers'])] +
+                       [Thread(target=read, args=(index, )) for index in range(options['readers'])])
+
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+            write_latencies.sort()
+
+            return {
+                'writes': len(write_latencies) / options['seconds'],
+                'reads': read_count[0] / options['seconds'],
+                'write_p99': percentile(write_latencies, .99) * 1000,
+                'errors': errors[0],
+            }
+
+    def create_database(self, database, amount_of_plays):
+        play_uuids = [uuid4().hex for _ in range(amount_of_plays)]
+
+        connection = sqlite3.connect(database)
+        for statement in SCHEMA:
+            connection.execute(statement)
+
+        connection.executemany('INSERT INTO play VALUES (?, ?, 0)', [(uuid, 10 ** 9) for uuid in play_uuids])
+        connection.commit()
+        connection.close()
+
+        return play_uuids
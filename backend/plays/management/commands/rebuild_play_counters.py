@@ -0,0 +1,40 @@
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...cache import invalidate_play_financials
+from ...models import Play
+
+
+class Command(BaseCommand):
+    help = 'Recounts the reserved and held accents of every play from its reservations and seat holds.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report plays whose counter drifted, exiting with an error if there is any.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted_plays = list(Play.objects.with_drifted_counters().values_list(
+                'uuid', 'reserved_accents', 'reservations_count', 'held_accents', 'seat_holds_count'))
+
+            for uuid, reserved_accents, reservations_count, held_accents, seat_holds_count in drifted_plays:
+                self.stdout.write('Play {}: counters say {} reserved and {} held accents, found {} reservations and {} '
+                                  'seat holds'.format(uuid, reserved_accents, held_accents, reservations_count,
+                                                      seat_holds_count))
+
+            if options['check']:
+                if drifted_plays:
+                    raise CommandError('{} play counter(s) drifted.'.format(len(drifted_plays)))
+
+                self.stdout.write(self.style.SUCCESS('Every play counter matches its reservations and seat holds.'))
+                return
+
+            rebuilt = Play.objects.rebuild_counters()
+
+            for uuid, *_ in drifted_plays:
+                transaction.on_commit(partial(invalidate_play_financials, uuid))
+
+        self.stdout.write(self.style.SUCCESS('Rebuilt the counters of {} play(s), {} had drifted.'.format(
+            rebuilt, len(drifted_plays))))
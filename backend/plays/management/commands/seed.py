@@ -0,0 +1,105 @@
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ...models import Attendee, Play, Reservation
+from ...seeding import SEED_PASSWORD, SEED_TARGET_ROWS_PER_SECOND, seed_dataset
+
+
+@contextmanager
+def bulk_load_pragmas():
+    if connection.vendor != 'sqlite':
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        previous = {pragma: cursor.execute('PRAGMA {}'.format(pragma)).fetchone()[0]
+                    for pragma in settings.SQLITE_BULK_LOAD_PRAGMAS}
+
+        for pragma, value in settings.SQLITE_BULK_LOAD_PRAGMAS.items():
+            cursor.execute('PRAGMA {} = {}'.format(pragma, value))
+
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for pragma, value in previous.items():
+                cursor.execute('PRAGMA {} = {}'.format(pragma, value))
+
+
+@contextmanager
+def indexes_dropped(models):
+    # Building an index once over the loaded rows is faster than updating it on every insert. Unique indexes stay, they
+    # back constraints.
+    with connection.schema_editor() as schema_editor:
+        for model in models:
+            for index in model._meta.indexes:
+                schema_editor.remove_index(model, index)
+
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as schema_editor:
+            for model in models:
+                for index in model._meta.indexes:
+                    schema_editor.add_index(model, index)
+
+
+class Command(BaseCommand):
+    help = ('Bulk loads users, attendees, plays and reservations into the configured database, for staging or '
+            'benchmarks. Every seeded user has the password {!r}. Aims at {} rows/s, which SQLite misses: the '
+            'default sizes load into an empty database at around 60k rows/s, most of it spent by SQLite inserting the '
+            'rows and keeping their unique indexes.'.format(SEED_PASSWORD, SEED_TARGET_ROWS_PER_SECOND))
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plays', type=int, default=1000)
+        parser.add_argument('--attendees', type=int, default=100000)
+        parser.add_argument('--reservations-per-play', type=int, default=100)
+        parser.add_argument('--seats-per-play', type=int, default=150,
+                            help='Seats of every play, its reservations plus the seats left to book.')
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        if options['reservations_per_play'] > options['attendees']:
+            raise CommandError('--attendees must be at least --reservations-per-play, '
+                               'every reservation of a play needs a distinct attendee.')
+
+        if options['reservations_per_play'] > options['seats_per_play']:
+            raise CommandError('--seats-per-play must be at least --reservations-per-play, '
+                               'every reservation of a play needs a seat.')
+
+        self.inserted = {}
+        self.started = self.reported = time.perf_counter()
+
+        # Foreign keys are checked once at the end, like loaddata does, rather than on every insert
+        with bulk_load_pragmas(), indexes_dropped((Attendee, Play, Reservation)):
+            with connection.constraint_checks_disabled():
+                seed_dataset(options['plays'], options['attendees'], options['reservations_per_play'],
+                             seats_per_play=options['seats_per_play'], batch_size=options['batch_size'],
+                             progress=self.report_progress)
+
+        connection.check_constraints(table_names=[model._meta.db_table for model in (Attendee, Play, Reservation)])
+
+        rows = sum(self.inserted.values())
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(self.style.SUCCESS('Seeded {} rows in {:.1f}s ({:.0f} rows/s): {}.'.format(
+            rows, elapsed, rows / elapsed, ', '.join(
+                '{} {}'.format(amount, model._meta.verbose_name_plural) for model, amount in self.inserted.items()))))
+
+        if rows / elapsed < SEED_TARGET_ROWS_PER_SECOND:
+            self.stdout.write(self.style.WARNING('Under the target of {} rows/s.'.format(SEED_TARGET_ROWS_PER_SECOND)))
+
+    def report_progress(self, model, inserted, amount):
+        self.inserted[model] = inserted
+        now = time.perf_counter()
+
+        # At most a line a second, and one when a table is done
+        if inserted < amount and now - self.reported < 1:
+            return
+
+        self.reported = now
+        self.stderr.write('{:<12} {:>10} of {:<10} {:>9.0f} rows/s'.format(
+            model.__name__, inserted, amount, sum(self.inserted.values()) / (now - self.started)))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...models import SeatHold
+from ...settings import SEAT_HOLD_SWEEP_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Releases the accents of expired seat holds, in batches read off the expiry index. Runs once, or forever '
+            'with --interval.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SEAT_HOLD_SWEEP_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Sweep again after this many seconds, until interrupted.')
+
+    def handle(self, *args, **options):
+        while True:
+            swept = SeatHold.objects.sweep_expired(batch_size=options['batch_size'])
+
+            if swept or options['interval'] is None:
+                self.stdout.write('Released {} expired seat hold(s).'.format(swept))
+
+            if options['interval'] is None:
+                return
+
+            time.sleep(options['interval'])
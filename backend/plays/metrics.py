@@ -0,0 +1,154 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from threading import Lock
+
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1., 2.5, 5., 10.)
+
+
+class QueryCounter:
+    # A connection.execute_wrapper(): counts queries and their time without DEBUG's connection.queries
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+# The counter of the request being served; context variables follow requests into sync_to_async() threads
+current_query_counter = ContextVar('current_query_counter', default=None)
+
+
+def count_request_queries(execute, sql, params, many, context):
+    query_counter = current_query_counter.get()
+
+    if query_counter is None:
+        return execute(sql, params, many, context)
+
+    return query_counter(execute, sql, params, many, context)
+
+
+class SerializationTimer:
+    # Time spent representing instances and rows as response data, less the queries run meanwhile: those are database
+    # time already. Nested representations are timed by the outermost one.
+    def __init__(self, query_counter):
+        self.query_counter = query_counter
+        self.seconds = 0.
+        self.depth = 0
+
+    @contextmanager
+    def timing(self):
+        self.depth += 1
+        started = time.perf_counter()
+        db_seconds = self.query_counter.seconds
+
+        try:
+            yield
+        finally:
+            self.depth -= 1
+
+            if not self.depth:
+                self.seconds += time.perf_counter() - started - (self.query_counter.seconds - db_seconds)
+
+
+current_serialization_timer = ContextVar('current_serialization_timer', default=None)
+
+
+def timed_serialization():
+    serialization_timer = current_serialization_timer.get()
+    return nullcontext() if serialization_timer is None else serialization_timer.timing()
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.latency_bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.latency_seconds = 0.
+        self.queries = 0
+        self.max_queries = 0
+        self.db_seconds = 0.
+        self.serialize_seconds = 0.
+        self.encode_seconds = 0.
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = Lock()
+        self.endpoints = {}
+
+    def observe(self, endpoint, latency_seconds, queries, db_seconds, serialize_seconds, encode_seconds):
+        with self.lock:
+            metrics = self.endpoints.setdefault(endpoint, EndpointMetrics())
+            metrics.requests += 1
+            metrics.latency_seconds += latency_seconds
+            metrics.queries += queries
+            metrics.max_queries = max(metrics.max_queries, queries)
+            metrics.db_seconds += db_seconds
+            metrics.serialize_seconds += serialize_seconds
+            metrics.encode_seconds += encode_seconds
+
+            bucket = bisect_left(LATENCY_BUCKETS, latency_seconds)
+            if bucket < len(LATENCY_BUCKETS):
+                metrics.latency_bucket_counts[bucket] += 1
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+
+    def render_prometheus(self):
+        lines = [
+            '# HELP plays_requests_total Requests served, per URL name.',
+            '# TYPE plays_requests_total counter',
+            '# HELP plays_request_duration_seconds Request latency, per URL name.',
+            '# TYPE plays_request_duration_seconds histogram',
+            '# HELP plays_db_queries_total SQL queries run, per URL name.',
+            '# TYPE plays_db_queries_total counter',
+            '# HELP plays_db_queries_max Most SQL queries run by a single request, per URL name.',
+            '# TYPE plays_db_queries_max gauge',
+            '# HELP plays_db_duration_seconds_total Time spent running SQL queries, per URL name.',
+            '# TYPE plays_db_duration_seconds_total counter',
+            '# HELP plays_serialize_duration_seconds_total Time spent serializing response data, per URL name.',
+            '# TYPE plays_serialize_duration_seconds_total counter',
+            '# HELP plays_encode_duration_seconds_total Time spent encoding response data to JSON, per URL name.',
+            '# TYPE plays_encode_duration_seconds_total counter',
+        ]
+
+        with self.lock:
+            for endpoint, metrics in sorted(self.endpoints.items()):
+                label = 'endpoint="{}"'.format(endpoint)
+                lines.append('plays_requests_total{{{}}} {}'.format(label, metrics.requests))
+
+                cumulative_count = 0
+                for upper_bound, count in zip(LATENCY_BUCKETS, metrics.latency_bucket_counts):
+                    cumulative_count += count
+                    lines.append('plays_request_duration_seconds_bucket{{{},le="{}"}} {}'.format(
+                        label, upper_bound, cumulative_count))
+
+                lines += [
+                    'plays_request_duration_seconds_bucket{{{},le="+Inf"}} {}'.format(label, metrics.requests),
+                    'plays_request_duration_seconds_sum{{{}}} {}'.format(label, metrics.latency_seconds),
+                    'plays_request_duration_seconds_count{{{}}} {}'.format(label, metrics.requests),
+                    'plays_db_queries_total{{{}}} {}'.format(label, metrics.queries),
+                    'plays_db_queries_max{{{}}} {}'.format(label, metrics.max_queries),
+                    'plays_db_duration_seconds_total{{{}}} {}'.format(label, metrics.db_seconds),
+                    'plays_serialize_duration_seconds_total{{{}}} {}'.format(label, metrics.serialize_seconds),
+                    'plays_encode_duration_seconds_total{{{}}} {}'.format(label, metrics.encode_seconds),
+                ]
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
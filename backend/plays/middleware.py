@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+
+from .metrics import (
+    QueryBudgetExceeded, QueryCounter, SerializationTimer, current_query_counter, current_serialization_timer, registry
+)
+from .settings import QUERY_BUDGETS
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    # Records, per URL name, latency, SQL queries and the time spent in the database, serializing the response data and
+    # encoding it
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if asyncio.iscoroutinefunction(get_response):
+            # Like MiddlewareMixin: lets async requests through without holding a thread
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        timers, tokens, started = self.start(request)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(tokens)
+
+        return self.finish(request, response, *timers, started)
+
+    async def __acall__(self, request):
+        timers, tokens, started = self.start(request)
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(tokens)
+
+        return self.finish(request, response, *timers, started)
+
+    def start(self, request):
+        # Queries are counted by count_request_queries(), installed on every connection by plays.signals, and
+        # serialization timed by the serializers, through timed_serialization()
+        query_counter = QueryCounter()
+        serialization_timer = SerializationTimer(query_counter)
+        tokens = (current_query_counter.set(query_counter), current_serialization_timer.set(serialization_timer))
+        request.metrics_encode_seconds = 0.
+
+        return (query_counter, serialization_timer), tokens, time.perf_counter()
+
+    def stop(self, tokens):
+        query_counter_token, serialization_timer_token = tokens
+        current_query_counter.reset(query_counter_token)
+        current_serialization_timer.reset(serialization_timer_token)
+
+    def finish(self, request, response, query_counter, serialization_timer, started):
+        latency_seconds = time.perf_counter() - started
+
+        if request.resolver_match is None:
+            return response
+
+        endpoint = request.resolver_match.view_name
+        registry.observe(endpoint, latency_seconds, query_counter.count, query_counter.seconds,
+                         serialization_timer.seconds, request.metrics_encode_seconds)
+
+        budget = QUERY_BUDGETS.get(endpoint, {}).get(request.method)
+        if budget is not None and query_counter.count > budget:
+            message = '{} {} ran {} queries, over its budget of {}'.format(
+                request.method, endpoint, query_counter.count, budget)
+
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+
+            logger.warning(message)
+
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before DRF renders the response, the callback right after it: rendering encodes the data
+        encode_started = time.perf_counter()
+
+        def record_encode_time(rendered_response):
+            request.metrics_encode_seconds += time.perf_counter() - encode_started
+
+        response.add_post_render_callback(record_encode_time)
+        return response
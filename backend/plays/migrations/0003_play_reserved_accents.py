@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:19
+
+from django.db import migrations, models
+
+
+def count_reserved_accents(apps, schema_editor):
+    Play = apps.get_model('plays', 'Play')
+
+    for play in Play.objects.annotate(reservations_count=models.Count('reservations')).iterator():
+        Play.objects.filter(uuid=play.uuid).update(reserved_accents=play.reservations_count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plays', '0002_creation_ordering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='play',
+            name='reserved_accents',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_reserved_accents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:23
+
+from django.db import migrations, models
+
+
+def number_seats(apps, schema_editor):
+    Reservation = apps.get_model('plays', 'Reservation')
+
+    seat = 0
+    last_play_uuid = None
+
+    for reservation in Reservation.objects.order_by('play_id', 'created_at', 'uuid').iterator():
+        if reservation.play_id != last_play_uuid:
+            seat = 0
+            last_play_uuid = reservation.play_id
+
+        Reservation.objects.filter(uuid=reservation.uuid).update(seat=seat)
+        seat += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plays', '0003_play_reserved_accents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='seat',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.RunPython(number_seats, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reservation',
+            name='seat',
+            field=models.PositiveIntegerField(default=None),
+        ),
+        migrations.AlterUniqueTogether(
+            name='reservation',
+            unique_together={('play', 'seat'), ('attendee', 'play')},
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:02
+
+from django.db import migrations, models
+
+import plays.money
+
+
+def convert_to_cents(apps, schema_editor):
+    Play = apps.get_model('plays', 'Play')
+
+    for play in Play.objects.only('uuid', 'fee', 'price').iterator():
+        Play.objects.filter(uuid=play.uuid).update(
+            fee_basis_points=plays.money.to_basis_points(play.fee), price_cents=plays.money.to_cents(play.price))
+
+
+def convert_from_cents(apps, schema_editor):
+    Play = apps.get_model('plays', 'Play')
+
+    for play in Play.objects.only('uuid', 'fee_basis_points', 'price_cents').iterator():
+        Play.objects.filter(uuid=play.uuid).update(
+            fee=float(plays.money.from_basis_points(play.fee_basis_points)),
+            price=float(plays.money.from_cents(play.price_cents)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plays', '0004_reservation_seat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='play',
+            name='fee_basis_points',
+            field=models.PositiveIntegerField(default=1355),
+        ),
+        migrations.AddField(
+            model_name='play',
+            name='price_cents',
+            field=models.PositiveIntegerField(default=1999),
+        ),
+        migrations.RunPython(convert_to_cents, convert_from_cents),
+        migrations.RemoveField(
+            model_name='play',
+            name='fee',
+        ),
+        migrations.RemoveField(
+            model_name='play',
+            name='price',
+        ),
+    ]
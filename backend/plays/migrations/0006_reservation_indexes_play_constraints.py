@@ -0,0 +1,49 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plays', '0005_play_money_in_cents'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reservation',
+            name='attendee',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='plays.attendee'),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='play',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='plays.play'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['play', 'created_at', 'uuid'], name='plays_reservation_play_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['attendee', 'created_at', 'uuid'], name='plays_reservation_attendee_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='play',
+            constraint=models.CheckConstraint(check=models.Q(('total_accents__gte', 0)), name='plays_play_total_accents_gte_0'),
+        ),
+        migrations.AddConstraint(
+            model_name='play',
+            constraint=models.CheckConstraint(check=models.Q(('reserved_accents__gte', 0), ('reserved_accents__lte', django.db.models.expressions.F('total_accents'))), name='plays_play_reserved_accents_in_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='play',
+            constraint=models.CheckConstraint(check=models.Q(('price_cents__gte', 0)), name='plays_play_price_cents_gte_0'),
+        ),
+        migrations.AddConstraint(
+            model_name='play',
+            constraint=models.CheckConstraint(check=models.Q(('fee_basis_points__gte', 0)), name='plays_play_fee_basis_points_gte_0'),
+        ),
+    ]
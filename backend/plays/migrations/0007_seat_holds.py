@@ -0,0 +1,59 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.expressions
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plays', '0006_reservation_indexes_play_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='play',
+            name='plays_play_reserved_accents_in_range',
+        ),
+        migrations.AddField(
+            model_name='play',
+            name='held_accents',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name='play',
+            constraint=models.CheckConstraint(check=models.Q(('reserved_accents__gte', 0), ('reserved_accents__lte', django.db.models.expressions.CombinedExpression(django.db.models.expressions.F('total_accents'), '-', django.db.models.expressions.F('held_accents')))), name='plays_play_reserved_accents_in_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='play',
+            constraint=models.CheckConstraint(check=models.Q(('held_accents__gte', 0)), name='plays_play_held_accents_gte_0'),
+        ),
+        migrations.AddField(
+            model_name='seathold',
+            name='attendee',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='plays.attendee'),
+        ),
+        migrations.AddField(
+            model_name='seathold',
+            name='play',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='plays.play'),
+        ),
+        migrations.AddIndex(
+            model_name='seathold',
+            index=models.Index(fields=['expires_at'], name='plays_seathold_expires_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='seathold',
+            unique_together={('attendee', 'play')},
+        ),
+    ]
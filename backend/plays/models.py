@@ -1,50 +1,567 @@
+from collections import Counter, defaultdict
+from functools import partial
 from uuid import uuid4
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.utils import timezone
 
-from .settings import PLAY_FEE_PERCENT, PLAY_PRICE, PLAY_TOTAL_ACCENTS
+from .cache import invalidate_play_financials
+from .events import get_broker, play_channel
+from .money import BASIS_POINTS_PER_UNIT, fee_cents, from_basis_points, from_cents, to_basis_points, to_cents
+from .settings import (
+    PLAY_FEE_BASIS_POINTS, PLAY_PRICE_CENTS, PLAY_TOTAL_ACCENTS, SEAT_HOLD_DURATION, SEAT_HOLD_SWEEP_BATCH_SIZE
+)
 
 
 class Attendee(models.Model):
     uuid = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     user = models.OneToOneField(to=User, on_delete=models.CASCADE, null=False, related_name='attendee')
+    created_at = models.DateTimeField(auto_now_add=True, null=False)
+
+    class Meta:
+        indexes = (models.Index(fields=('created_at', 'uuid'), name='plays_attendee_created_idx'), )
+
+
+class PlaySoldOut(Exception):
+    pass
+
+
+class SeatHoldExpired(Exception):
+    pass
+
+
+class PlayQuerySet(models.QuerySet):
+    def with_available_accents(self):
+        return self.annotate(
+            available_accents=models.F('total_accents') - models.F('reserved_accents') - models.F('held_accents'))
+
+    def counted_accents(self):
+        # What the counters should say: the reservations and seat holds of every play, one subquery each
+        def count_per_play(model):
+            rows = model.objects.filter(play=models.OuterRef('pk')).order_by().values('play').annotate(
+                count=models.Count('uuid')).values('count')
+
+            return Coalesce(models.Subquery(rows), 0)
+
+        return {'reservations_count': count_per_play(Reservation), 'seat_holds_count': count_per_play(SeatHold)}
+
+    def with_drifted_counters(self):
+        return self.annotate(**self.counted_accents()).exclude(
+            reserved_accents=models.F('reservations_count'), held_accents=models.F('seat_holds_count'))
+
+    def rebuild_counters(self):
+        counted_accents = self.counted_accents()
+
+        return self.update(reserved_accents=counted_accents['reservations_count'],
+                           held_accents=counted_accents['seat_holds_count'])
+
+    def with_financials(self):
+        # Integer cents all the way, so totals are exact in SQL; the fee is rounded half up per play, like fee_cents()
+        revenue_cents = models.F('price_cents') * models.F('reserved_accents')
+
+        return self.annotate(
+            revenue_cents=models.ExpressionWrapper(revenue_cents, output_field=models.IntegerField()),
+            total_fee_cents=models.ExpressionWrapper(
+                (revenue_cents * models.F('fee_basis_points') + BASIS_POINTS_PER_UNIT // 2) / BASIS_POINTS_PER_UNIT,
+                output_field=models.IntegerField()),
+        )
+
+    def financial_summary(self):
+        # Aliases differ from the annotations they sum, which they would otherwise shadow
+        summary = self.with_financials().aggregate(
+            plays=models.Count('uuid'),
+            sum_of_reserved_accents=Coalesce(models.Sum('reserved_accents'), 0),
+            sum_of_revenue_cents=Coalesce(models.Sum('revenue_cents'), 0),
+            sum_of_total_fee_cents=Coalesce(models.Sum('total_fee_cents'), 0),
+        )
+
+        return {
+            'plays': summary['plays'],
+            'reserved_accents': summary['sum_of_reserved_accents'],
+            'revenue': from_cents(summary['sum_of_revenue_cents']),
+            'total_fee': from_cents(summary['sum_of_total_fee_cents']),
+        }
+
+    def box_office(self):
+        # Per-play figures and their totals from one query: the totals are window sums over the same rows
+        plays = self.with_financials().annotate(
+            sum_of_total_accents=models.Window(models.Sum('total_accents')),
+            sum_of_reserved_accents=models.Window(models.Sum('reserved_accents')),
+            sum_of_held_accents=models.Window(models.Sum('held_accents')),
+            sum_of_revenue_cents=models.Window(models.Sum('revenue_cents')),
+            sum_of_total_fee_cents=models.Window(models.Sum('total_fee_cents')),
+        ).order_by('created_at', 'uuid').values_list(
+            'uuid', 'name', 'total_accents', 'reserved_accents', 'held_accents', 'revenue_cents', 'total_fee_cents',
+            'sum_of_total_accents', 'sum_of_reserved_accents', 'sum_of_held_accents', 'sum_of_revenue_cents',
+            'sum_of_total_fee_cents')
+
+        rows = []
+        sums = (0, 0, 0, 0, 0)
+
+        for uuid, name, total_accents, reserved_accents, held_accents, revenue_cents, total_fee_cents, *sums in plays:
+            rows.append({
+                'uuid': uuid,
+                'name': name,
+                'total_accents': total_accents,
+                'reserved_accents': reserved_accents,
+                'held_accents': held_accents,
+                'available_accents': total_accents - reserved_accents - held_accents,
+                'revenue': from_cents(revenue_cents),
+                'total_fee': from_cents(total_fee_cents),
+            })
+
+        (sum_of_total_accents, sum_of_reserved_accents, sum_of_held_accents, sum_of_revenue_cents,
+         sum_of_total_fee_cents) = sums
+
+        return {
+            'totals': {
+                'plays': len(rows),
+                'total_accents': sum_of_total_accents,
+                'reserved_accents': sum_of_reserved_accents,
+                'held_accents': sum_of_held_accents,
+                'available_accents': sum_of_total_accents - sum_of_reserved_accents - sum_of_held_accents,
+                'revenue': from_cents(sum_of_revenue_cents),
+                'total_fee': from_cents(sum_of_total_fee_cents),
+            },
+            'plays': rows,
+        }
+
+    def take_accents(self, play_uuid, counter, amount):
+        # A single conditional UPDATE, so concurrent bookings and holds can never push a play past its total accents
+        updated = self.filter(
+            uuid=play_uuid,
+            reserved_accents__lte=models.F('total_accents') - models.F('held_accents') - amount,
+        ).update(**{counter: models.F(counter) + amount})
+
+        if not updated:
+            raise PlaySoldOut()
+
+        transaction.on_commit(partial(invalidate_play_financials, play_uuid))
+
+    def give_back_accents(self, play_uuid, counter, amount):
+        self.filter(uuid=play_uuid).update(**{counter: models.F(counter) - amount})
+        transaction.on_commit(partial(invalidate_play_financials, play_uuid))
+
+    def reserve_accents(self, play_uuid, amount=1):
+        self.take_accents(play_uuid, 'reserved_accents', amount)
+
+    def release_accents(self, play_uuid, amount=1):
+        self.give_back_accents(play_uuid, 'reserved_accents', amount)
+
+    def hold_accents(self, play_uuid, amount=1):
+        self.take_accents(play_uuid, 'held_accents', amount)
+
+    def release_held_accents(self, play_uuid, amount=1):
+        self.give_back_accents(play_uuid, 'held_accents', amount)
+
+    def publish_seat_changes(self, play_uuid, reserved_seats=(), released_seats=()):
+        # Run on commit, reading the counter the transaction left; skipped when nobody listens to the play
+        broker = get_broker()
+        channel = play_channel(play_uuid)
+
+        if not broker.has_subscribers(channel):
+            return
+
+        available_accents = self.filter(uuid=play_uuid).with_available_accents().values_list(
+            'available_accents', flat=True).first()
+
+        if available_accents is None:
+            return
+
+        broker.publish(channel, {
+            'play': str(play_uuid),
+            'available_accents': available_accents,
+            'reserved_seats': list(reserved_seats),
+            'released_seats': list(released_seats),
+        })
 
 
 class Play(models.Model):
     uuid = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     name = models.CharField(max_length=100, null=False, blank=False)
-    fee = models.FloatField(null=False, default=PLAY_FEE_PERCENT)
-    price = models.FloatField(null=False, default=PLAY_PRICE)
+    fee_basis_points = models.PositiveIntegerField(null=False, default=PLAY_FEE_BASIS_POINTS)
+    price_cents = models.PositiveIntegerField(null=False, default=PLAY_PRICE_CENTS)
     total_accents = models.IntegerField(null=False, default=PLAY_TOTAL_ACCENTS)
+    reserved_accents = models.IntegerField(null=False, default=0, editable=False)
+    # Accents taken by unexpired (or not yet swept) seat holds, kept up to date like reserved_accents
+    held_accents = models.IntegerField(null=False, default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True, null=False)
+
+    objects = PlayQuerySet.as_manager()
+
+    class Meta:
+        indexes = (models.Index(fields=('created_at', 'uuid'), name='plays_play_created_idx'), )
+        constraints = (
+            models.CheckConstraint(check=models.Q(total_accents__gte=0), name='plays_play_total_accents_gte_0'),
+            # The database itself refuses to oversell a play, whatever path updates the counters
+            models.CheckConstraint(
+                check=models.Q(reserved_accents__gte=0,
+                               reserved_accents__lte=models.F('total_accents') - models.F('held_accents')),
+                name='plays_play_reserved_accents_in_range'),
+            models.CheckConstraint(check=models.Q(held_accents__gte=0), name='plays_play_held_accents_gte_0'),
+            models.CheckConstraint(check=models.Q(price_cents__gte=0), name='plays_play_price_cents_gte_0'),
+            models.CheckConstraint(check=models.Q(fee_basis_points__gte=0), name='plays_play_fee_basis_points_gte_0'),
+        )
+
+    # Only ever changed by the conditional UPDATEs of PlayQuerySet
+    counter_fields = ('reserved_accents', 'held_accents')
+
+    def save(self, *args, **kwargs):
+        # An update writes every other column: the counters read along with the instance may be stale by now
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.counter_fields]
+
+        super().save(*args, **kwargs)
 
     @property
-    def amount_of_available_accents(self):
-        reservations = self.reservations.all()
+    def fee(self):
+        return from_basis_points(self.fee_basis_points)
 
-        if reservations:
-            return self.total_accents - len(reservations)
+    @fee.setter
+    def fee(self, value):
+        self.fee_basis_points = to_basis_points(value)
 
-        return self.total_accents
+    @property
+    def price(self):
+        return from_cents(self.price_cents)
+
+    @price.setter
+    def price(self, value):
+        self.price_cents = to_cents(value)
 
     @property
-    def revenue(self):
-        reservations = self.reservations.all()
+    def amount_of_reserved_accents(self):
+        # Kept up to date by Reservation.save() and ReservationQuerySet.delete(): reading it never touches reservations
+        return self.reserved_accents
 
-        if reservations:
-            return self.price * len(reservations)
+    @property
+    def amount_of_held_accents(self):
+        return self.held_accents
 
-        return 0.
+    @property
+    def amount_of_available_accents(self):
+        return self.total_accents - self.amount_of_reserved_accents - self.amount_of_held_accents
+
+    @property
+    def revenue(self):
+        return from_cents(self.price_cents * self.amount_of_reserved_accents)
 
     @property
     def total_fee(self):
-        return self.revenue * self.fee
+        return from_cents(fee_cents(self.price_cents * self.amount_of_reserved_accents, self.fee_basis_points))
+
+
+class ReservationQuerySet(models.QuerySet):
+    def delete(self):
+        # Gives the accents of the deleted reservations back, once per play, by what was actually deleted. Reservations
+        # have no delete signals, so cascades delete them in bulk without loading them: a deleted play has no counter
+        # left to update, and a deleted attendee deletes its reservations through here first.
+        seats_per_play = defaultdict(list)
+
+        for play_uuid, seat in self.values_list('play_id', 'seat'):
+            seats_per_play[play_uuid].append(seat)
+
+        deleted = 0
+
+        with transaction.atomic():
+            for play_uuid, seats in seats_per_play.items():
+                play_deleted, _ = super(ReservationQuerySet, self.filter(play_id=play_uuid)).delete()
+
+                if play_deleted:
+                    Play.objects.release_accents(play_uuid, play_deleted)
+                    transaction.on_commit(partial(Play.objects.publish_seat_changes, play_uuid, released_seats=seats))
+
+                deleted += play_deleted
+
+        return deleted, {self.model._meta.label: deleted}
+
+    def lowest_free_seats(self, play_uuid, total_accents, amount):
+        # The amount lowest seats of the play nobody took, fewer when it runs out of seats. Read off the (play, seat)
+        # unique index, without reading every taken seat: the seats before the first taken one, then the runs of free
+        # seats right after a taken seat, each up to the next taken seat.
+        taken = self.filter(play_id=play_uuid)
+        first_taken_seat = taken.order_by('seat').values_list('seat', flat=True).first()
+        first_run_end = total_accents if first_taken_seat is None else min(first_taken_seat, total_accents)
+        seats = list(range(min(first_run_end, amount)))
+
+        if first_taken_seat is None or len(seats) == amount:
+            return seats
+
+        for run_start, run_end in self.free_seat_runs(play_uuid, total_accents)[:amount - len(seats)]:
+            seats += range(run_start, min(run_end, total_accents))[:amount - len(seats)]
+
+            if len(seats) == amount:
+                break
+
+        return seats
+
+    def free_seat_runs(self, play_uuid, total_accents):
+        # (first, last + 1) seats of every run of free seats right after a taken seat of the play, lowest first
+        taken = self.filter(play_id=play_uuid)
+
+        return taken.annotate(run_start=models.F('seat') + 1).filter(
+            ~models.Exists(taken.filter(seat=models.OuterRef('run_start'))),
+        ).annotate(
+            run_end=Coalesce(models.Subquery(
+                taken.filter(seat__gt=models.OuterRef('seat')).order_by('seat').values('seat')[:1]), total_accents),
+        ).order_by('seat').values_list('run_start', 'run_end')
+
+    def bulk_reserve(self, bookings):
+        # Returns, for every (attendee uuid, play uuid, seat or None) booking, its new Reservation or its field errors
+        attendee_uuids = {attendee_uuid for attendee_uuid, _, _ in bookings}
+        play_uuids = {play_uuid for _, play_uuid, _ in bookings}
+        asked_seats = {seat for _, _, seat in bookings if seat is not None}
+
+        existing_attendee_uuids = set(Attendee.objects.filter(uuid__in=attendee_uuids).values_list('uuid', flat=True))
+
+        total_accents = {}
+        available_accents = {}
+
+        for play_uuid, play_total_accents, play_available_accents in Play.objects.filter(
+                uuid__in=play_uuids).with_available_accents().values_list('uuid', 'total_accents', 'available_accents'):
+            total_accents[play_uuid] = play_total_accents
+            available_accents[play_uuid] = play_available_accents
+
+        # Holds of the booking attendees are used up by their reservations, their accents are available to them
+        held_pairs = {}
+
+        for hold_uuid, attendee_uuid, play_uuid in SeatHold.objects.filter(
+                attendee_id__in=attendee_uuids, play_id__in=play_uuids).values_list('uuid', 'attendee_id', 'play_id'):
+            held_pairs[attendee_uuid, play_uuid] = hold_uuid
+
+        # Only the reservations the batch can collide with: those of its attendees, and those on the seats it asks for
+        reserved_pairs = set(self.filter(attendee_id__in=attendee_uuids, play_id__in=play_uuids).values_list(
+            'attendee_id', 'play_id'))
+        taken_seats = defaultdict(set)
+
+        for play_uuid, seat in self.filter(play_id__in=play_uuids, seat__in=asked_seats).values_list('play_id', 'seat'):
+            taken_seats[play_uuid].add(seat)
+
+        results = [None] * len(bookings)
+        reservations = []
+        reservations_without_seat = defaultdict(list)
+        reserved_accents_per_play = Counter()
+        used_holds = defaultdict(list)
+
+        # Bookings asking for a seat go first: one left to the first free seat cannot take a seat asked for further on
+        seats_asked_first = sorted(enumerate(bookings), key=lambda booking: booking[1][2] is None)
+
+        for index, (attendee_uuid, play_uuid, seat) in seats_asked_first:
+            errors = {}
+
+            if attendee_uuid not in existing_attendee_uuids:
+                errors['attendee'] = ['Invalid pk "{}" - object does not exist.'.format(attendee_uuid)]
+
+            hold_uuid = held_pairs.get((attendee_uuid, play_uuid))
+
+            if play_uuid not in available_accents:
+                errors['play'] = ['Invalid pk "{}" - object does not exist.'.format(play_uuid)]
+            elif available_accents[play_uuid] <= 0 and hold_uuid is None:
+                errors['play'] = ['This play is sold out.']
+            elif seat is not None and seat >= total_accents[play_uuid]:
+                last_seat = total_accents[play_uuid] - 1
+                errors['seat'] = ['Ensure this value is less than or equal to {}.'.format(last_seat)]
+
+            if not errors and (attendee_uuid, play_uuid) in reserved_pairs:
+                errors['non_field_errors'] = ['The fields attendee, play must make a unique set.']
+            elif not errors and seat in taken_seats[play_uuid]:
+                errors['non_field_errors'] = ['The fields play, seat must make a unique set.']
+
+            if errors:
+                results[index] = errors
+                continue
+
+            reserved_pairs.add((attendee_uuid, play_uuid))
+            reserved_accents_per_play[play_uuid] += 1
+
+            if hold_uuid is None:
+                available_accents[play_uuid] -= 1
+            else:
+                used_holds[play_uuid].append(hold_uuid)
+
+            reservation = self.model(attendee_id=attendee_uuid, play_id=play_uuid, seat=seat)
+            reservations.append(reservation)
+            results[index] = reservation
+
+            if seat is None:
+                reservations_without_seat[play_uuid].append(reservation)
+            else:
+                taken_seats[play_uuid].add(seat)
+
+        for play_uuid, play_reservations in reservations_without_seat.items():
+            # Seats asked for by the batch are not taken in the database yet: as many more free seats are read, to skip
+            play_taken_seats = taken_seats[play_uuid]
+            free_seats = [seat for seat in self.lowest_free_seats(
+                play_uuid, total_accents[play_uuid], len(play_reservations) + len(play_taken_seats))
+                if seat not in play_taken_seats]
+
+            if len(free_seats) < len(play_reservations):
+                # The accents were available when read: reservations were made concurrently since
+                raise PlaySoldOut()
+
+            for reservation, seat in zip(play_reservations, free_seats):
+                reservation.seat = seat
+
+        with transaction.atomic():
+            # Holds swept meanwhile give back fewer accents, the reserve below then fails rather than oversells
+            SeatHold.objects.release(used_holds)
+
+            for play_uuid, amount in reserved_accents_per_play.items():
+                Play.objects.reserve_accents(play_uuid, amount)
+
+            self.bulk_create(reservations)
+
+            reserved_seats = defaultdict(list)
+            for reservation in reservations:
+                reserved_seats[reservation.play_id].append(reservation.seat)
+
+            for play_uuid, seats in reserved_seats.items():
+                transaction.on_commit(partial(Play.objects.publish_seat_changes, play_uuid, reserved_seats=seats))
+
+        return results
 
 
 class Reservation(models.Model):
     uuid = models.UUIDField(primary_key=True, default=uuid4, editable=False)
-    attendee = models.ForeignKey(to=Attendee, on_delete=models.CASCADE, related_name='reservations', null=False)
-    play = models.ForeignKey(to=Play, on_delete=models.CASCADE, related_name='reservations', null=False)
+    # No single column indexes: the composite indexes below lead with attendee and play
+    attendee = models.ForeignKey(to=Attendee, on_delete=models.CASCADE, related_name='reservations', null=False,
+                                 db_index=False)
+    play = models.ForeignKey(to=Play, on_delete=models.CASCADE, related_name='reservations', null=False,
+                             db_index=False)
+    # Zero based; left empty, the first free seat of the play is assigned on creation
+    seat = models.PositiveIntegerField(null=False, default=None)
+    created_at = models.DateTimeField(auto_now_add=True, null=False)
+
+    objects = ReservationQuerySet.as_manager()
+
+    class Meta:
+        unique_together = (('attendee', 'play'), ('play', 'seat'))
+        indexes = (
+            models.Index(fields=('created_at', 'uuid'), name='plays_reservation_created_idx'),
+            models.Index(fields=('play', 'created_at', 'uuid'), name='plays_reservation_play_idx'),
+            models.Index(fields=('attendee', 'created_at', 'uuid'), name='plays_reservation_attendee_idx'),
+        )
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        # Taking the accent and inserting the reservation commit or roll back together
+        with transaction.atomic():
+            # A hold of the attendee on the play is used up: its accent goes to the reservation
+            held, _ = SeatHold.objects.filter(attendee_id=self.attendee_id, play_id=self.play_id).delete()
+
+            if held:
+                Play.objects.release_held_accents(self.play_id, held)
+
+            Play.objects.reserve_accents(self.play_id)
+
+            if self.seat is None:
+                # The conditional update above holds the play's write lock, so no other booking can pick this seat
+                free_seats = Reservation.objects.lowest_free_seats(self.play_id, self.play.total_accents, 1)
+
+                if not free_seats:
+                    raise PlaySoldOut()
+
+                self.seat = free_seats[0]
+
+            super().save(*args, **kwargs)
+            transaction.on_commit(partial(Play.objects.publish_seat_changes, self.play_id, reserved_seats=[self.seat]))
+
+    def delete(self, using=None, keep_parents=False):
+        return Reservation.objects.using(using).filter(pk=self.pk).delete()
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    def hold(self, attendee, play, duration=SEAT_HOLD_DURATION):
+        # Takes an accent of the play for duration (a timedelta), or raises PlaySoldOut. An expired hold of the attendee
+        # on the play, not swept yet, is released first: it gives its accent back and makes way for the new one.
+        with transaction.atomic():
+            expired = list(self.filter(attendee=attendee, play=play, expires_at__lte=timezone.now()).values_list(
+                'uuid', flat=True))
+
+            if expired:
+                self.release({play.uuid: expired})
+
+            Play.objects.hold_accents(play.uuid)
+            hold = self.create(attendee=attendee, play=play, expires_at=timezone.now() + duration)
+            transaction.on_commit(partial(Play.objects.publish_seat_changes, play.uuid))
+
+        return hold
+
+    def release(self, holds_per_play):
+        # Deletes the holds, given as {play uuid: [hold uuids]}, and gives their accents back. Counters drop by what was
+        # actually deleted: a hold confirmed or released meanwhile is not given back twice.
+        released = 0
+
+        for play_uuid, hold_uuids in holds_per_play.items():
+            with transaction.atomic():
+                deleted, _ = self.filter(uuid__in=hold_uuids).delete()
+
+                if deleted:
+                    Play.objects.release_held_accents(play_uuid, deleted)
+                    transaction.on_commit(partial(Play.objects.publish_seat_changes, play_uuid))
+
+            released += deleted
+
+        return released
+
+    def sweep_expired(self, now=None, batch_size=SEAT_HOLD_SWEEP_BATCH_SIZE):
+        # Batches of holds expired by now, read off the expires_at index; returns how many were released
+        now = now or timezone.now()
+        swept = 0
+
+        while True:
+            expired = self.filter(expires_at__lte=now).order_by('expires_at').values_list(
+                'uuid', 'play_id')[:batch_size]
+            holds_per_play = defaultdict(list)
+
+            for hold_uuid, play_uuid in expired:
+                holds_per_play[play_uuid].append(hold_uuid)
+
+            if not holds_per_play:
+                return swept
+
+            swept += self.release(holds_per_play)
+
+
+class SeatHold(models.Model):
+    uuid = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    # The unique (attendee, play) index leads with attendee
+    attendee = models.ForeignKey(to=Attendee, on_delete=models.CASCADE, related_name='seat_holds', null=False,
+                                 db_index=False)
+    play = models.ForeignKey(to=Play, on_delete=models.CASCADE, related_name='seat_holds', null=False)
+    expires_at = models.DateTimeField(null=False)
+    created_at = models.DateTimeField(auto_now_add=True, null=False)
+
+    objects = SeatHoldQuerySet.as_manager()
 
     class Meta:
         unique_together = (('attendee', 'play'), )
+        indexes = (models.Index(fields=('expires_at', ), name='plays_seathold_expires_idx'), )
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def release(self):
+        return SeatHold.objects.release({self.play_id: [self.uuid]})
+
+    def confirm(self, seat=None):
+        # The hold becomes a reservation: its accent is given back and taken again by the reservation, under the write
+        # lock the delete took, so nobody else can take it in between
+        with transaction.atomic():
+            deleted, _ = SeatHold.objects.filter(uuid=self.uuid, expires_at__gt=timezone.now()).delete()
+
+            if not deleted:
+                raise SeatHoldExpired()
+
+            Play.objects.release_held_accents(self.play_id)
+            reservation = Reservation(attendee_id=self.attendee_id, play_id=self.play_id, seat=seat)
+            reservation.play = self.play
+            reservation.save()
+
+        return reservation
@@ -0,0 +1,27 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+
+CENTS_PER_UNIT = 100
+BASIS_POINTS_PER_UNIT = 10000
+
+
+def to_cents(amount):
+    # str() first, so floats convert from their shortest representation (19.99, not 19.989999...)
+    return int((Decimal(str(amount)) * CENTS_PER_UNIT).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    return Decimal(cents) / CENTS_PER_UNIT
+
+
+def to_basis_points(rate):
+    return int((Decimal(str(rate)) * BASIS_POINTS_PER_UNIT).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_basis_points(basis_points):
+    return Decimal(basis_points) / BASIS_POINTS_PER_UNIT
+
+
+def fee_cents(revenue_cents, fee_basis_points):
+    # Rounded half up to the cent, with integers only; PlayQuerySet.with_financials() does the same in SQL
+    return (revenue_cents * fee_basis_points + BASIS_POINTS_PER_UNIT // 2) // BASIS_POINTS_PER_UNIT
@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+from .settings import MAX_PAGE_SIZE, PAGE_SIZE
+
+
+class CreationCursorPagination(CursorPagination):
+    # Keyset pagination over the (created_at, uuid) index: every page is an index range scan, however deep it is
+    ordering = ('created_at', 'uuid')
+    page_size = PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
@@ -0,0 +1,12 @@
+from base64 import b64encode
+
+
+def encode_seat_map(total_accents, taken_seats):
+    # One bit per seat, most significant bit first: seat 0 is the highest bit of the first byte
+    size = max([total_accents] + [seat + 1 for seat in taken_seats])
+    bitmap = bytearray((size + 7) // 8)
+
+    for seat in taken_seats:
+        bitmap[seat // 8] |= 0x80 >> (seat % 8)
+
+    return b64encode(bytes(bitmap)).decode('ascii')
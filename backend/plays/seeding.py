@@ -0,0 +1,174 @@
+from collections import namedtuple
+from datetime import timedelta
+from collections.abc import Sequence
+from itertools import islice
+from uuid import UUID, uuid4
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .models import Attendee, Play, Reservation
+from .settings import PLAY_TOTAL_ACCENTS
+
+
+SEED_PASSWORD = 'raduguiF1re'
+
+# What manage.py seed aims at on its default sizes, and reports it against
+SEED_TARGET_ROWS_PER_SECOND = 100000
+
+SeededDataset = namedtuple('SeededDataset', ('play_uuids', 'attendee_uuids', 'reservations_per_play', 'seats_per_play'))
+
+
+class SeededUUIDs(Sequence):
+    # The n-th row's key is a random base plus n: rows reference each other without reading keys back, and the keys of
+    # millions of rows are never held in memory
+    def __init__(self, amount):
+        self.base = uuid4().int >> 64 << 64
+        self.amount = amount
+        self.native = connection.features.has_native_uuid_field
+
+    def db_value(self, index):
+        # What a UUIDField stores, without building the UUID where the column is a 32 characters hex string
+        if self.native:
+            return self[index]
+
+        return '{:032x}'.format(self.base + index)
+
+    def __len__(self):
+        return self.amount
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[index] for index in range(*index.indices(self.amount))]
+
+        if not -self.amount <= index < self.amount:
+            raise IndexError('seeded uuid index out of range')
+
+        return UUID(int=self.base + index % self.amount)
+
+
+class SeededTimes:
+    # The n-th row of a table is created n microseconds after the first, the last one now. CursorPagination positions
+    # on created_at alone, so rows sharing it would repeat pages past its offset cutoff.
+    def __init__(self, amount):
+        now = timezone.now()
+
+        # Naive in the connection's time zone, as the database adapts it
+        if settings.USE_TZ:
+            now = timezone.make_naive(now, connection.timezone)
+
+        # From a whole second: the n-th value is that second plus n microseconds
+        start = now - timedelta(microseconds=amount)
+        self.base = start.replace(microsecond=0)
+        self.offset = start.microsecond
+        self.text = connection.vendor == 'sqlite'
+        self.adapt = connection.ops.adapt_datetimefield_value
+        self.second = self.second_text = None
+
+    def db_value(self, index):
+        seconds, microseconds = divmod(self.offset + index, 1000000)
+
+        if not self.text:
+            return self.adapt(self.base + timedelta(seconds=seconds, microseconds=microseconds))
+
+        # SQLite stores str(datetime): its seconds are formatted once, for a million rows
+        if seconds != self.second:
+            self.second = seconds
+            self.second_text = str(self.base + timedelta(seconds=seconds))
+
+        # Like str(), which leaves out zero microseconds
+        return '{}.{:06d}'.format(self.second_text, microseconds) if microseconds else self.second_text
+
+
+def bulk_insert(model, columns, rows, amount, batch_size, progress=None):
+    # One INSERT run by executemany() per batch: bulk_create() prepares every value of every row through its field,
+    # which tops out around 10k rows/s. Rows hold the database values of the columns, the other columns take the values
+    # of a default instance.
+    template = model()
+    constant_fields = [field for field in model._meta.concrete_fields
+                       if field.attname not in columns and not isinstance(field, models.AutoField)]
+    constants = tuple(field.get_db_prep_save(field.pre_save(template, add=True), connection)
+                      for field in constant_fields)
+
+    fields = [model._meta.get_field(column) for column in columns] + constant_fields
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)))
+
+    rows = iter(rows)
+    inserted = 0
+
+    with connection.cursor() as cursor:
+        while True:
+            batch = [row + constants for row in islice(rows, batch_size)]
+
+            if not batch:
+                return
+
+            cursor.executemany(sql, batch)
+            inserted += len(batch)
+
+            if progress is not None:
+                progress(model, inserted, amount)
+
+
+def seed_dataset(amount_of_plays, amount_of_attendees, reservations_per_play, seats_per_play=None, batch_size=5000,
+                 progress=None):
+    # Batched inserts in every table and the shared password hashed once: factories pay an INSERT (and a hash) per row.
+    # Rows of a table get distinct created_at and uuids, both following the insertion order. Plays have seats_per_play
+    # seats, the seats of a default play unless that is fewer than their reservations. progress(model, inserted, amount)
+    # is called after every batch.
+    assert reservations_per_play <= amount_of_attendees, 'every reservation of a play needs a distinct attendee'
+
+    if seats_per_play is None:
+        seats_per_play = max(PLAY_TOTAL_ACCENTS, reservations_per_play)
+
+    assert reservations_per_play <= seats_per_play, 'every reservation of a play needs a seat'
+
+    prefix = uuid4().hex[:8]
+    password = make_password(SEED_PASSWORD)
+    play_uuids = SeededUUIDs(amount_of_plays)
+    attendee_uuids = SeededUUIDs(amount_of_attendees)
+    reservation_uuids = SeededUUIDs(amount_of_plays * reservations_per_play)
+
+    with transaction.atomic():
+        bulk_insert(User, ('username', 'email', 'password'), (
+            ('{}-{}'.format(prefix, index), '{}.{}@host.com'.format(prefix, index), password)
+            for index in range(amount_of_attendees)
+        ), amount_of_attendees, batch_size, progress)
+
+        # User ids are left to the database: they are read back, in insertion order
+        user_ids = User.objects.filter(username__startswith=prefix + '-').order_by('id').values_list('id', flat=True)
+        attendee_times = SeededTimes(amount_of_attendees)
+        bulk_insert(Attendee, ('uuid', 'user_id', 'created_at'), (
+            (attendee_uuids.db_value(index), user_id, attendee_times.db_value(index))
+            for index, user_id in enumerate(user_ids.iterator(chunk_size=batch_size))
+        ), amount_of_attendees, batch_size, progress)
+
+        play_times = SeededTimes(amount_of_plays)
+        bulk_insert(Play, ('uuid', 'name', 'total_accents', 'reserved_accents', 'created_at'), (
+            (play_uuids.db_value(index), 'Play {} #{}'.format(prefix, index), seats_per_play, reservations_per_play,
+             play_times.db_value(index))
+            for index in range(amount_of_plays)
+        ), amount_of_plays, batch_size, progress)
+
+        # Reservation.save() is skipped too, the counters were set on the plays above
+        reservation_times = SeededTimes(len(reservation_uuids))
+        bulk_insert(Reservation, ('uuid', 'play_id', 'attendee_id', 'seat', 'created_at'), (
+            (reservation_uuids.db_value(play_index * reservations_per_play + seat), play_uuids.db_value(play_index),
+             attendee_uuids.db_value((play_index + seat) % amount_of_attendees), seat,
+             reservation_times.db_value(play_index * reservations_per_play + seat))
+            for play_index in range(amount_of_plays)
+            for seat in range(reservations_per_play)
+        ), len(reservation_uuids), batch_size, progress)
+
+    return SeededDataset(
+        play_uuids=play_uuids,
+        attendee_uuids=attendee_uuids,
+        reservations_per_play=reservations_per_play,
+        seats_per_play=seats_per_play,
+    )
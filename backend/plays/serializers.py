@@ -1,42 +1,213 @@
 from django.contrib.auth.models import User
-from rest_framework.serializers import ModelSerializer, PrimaryKeyRelatedField, Serializer
-from rest_framework.fields import CharField, EmailField, UUIDField
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework.serializers import (
+    ModelSerializer, PrimaryKeyRelatedField, Serializer, SerializerMethodField, ValidationError
+)
+from rest_framework.fields import CharField, DecimalField, EmailField, IntegerField, ListField, UUIDField
 
-from .models import Attendee, Play, Reservation
+from .hashers import hash_password
+from .metrics import timed_serialization
+from .models import Attendee, Play, PlaySoldOut, Reservation, SeatHold
+from .money import from_basis_points, from_cents
+from .seats import encode_seat_map
 
 
-class AttendeeSerializer(Serializer):
+class TimedRepresentationMixin:
+    # Representations count as the serialization time of the request, in the metrics of RequestMetricsMiddleware
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+
+class AttendeeSerializer(TimedRepresentationMixin, Serializer):
     uuid = UUIDField(read_only=True)
     username = CharField(source='user.username')
     password = CharField(source='user.password', write_only=True)
     email = EmailField(source='user.email')
 
     def create(self, validated_data):
-        user = User.objects.create_user(**validated_data['user'])
+        user_data = validated_data['user']
+
+        # Hashed on the bounded pool rather than by create_user() on the request thread
+        user = User.objects.create(
+            username=User.normalize_username(user_data['username']),
+            email=User.objects.normalize_email(user_data['email']),
+            password=hash_password(user_data['password']),
+        )
         attendee = Attendee.objects.create(user=user)
         return attendee
 
 
-class PlaySerializer(ModelSerializer):
+class ValuesSerializer:
+    # Represents .values() rows like its model serializer represents instances, without field objects per row.
+    # fields maps every field, in the model serializer's order, to its column and a function representing its value.
+    fields = {}
+
+    def __init__(self, fields=None):
+        if fields is not None:
+            self.fields = {field: column for field, column in self.fields.items() if field in fields}
+
+    @property
+    def columns(self):
+        return [column for column, _ in self.fields.values()]
+
+    def to_representation(self, rows):
+        fields = [(field, column, represent) for field, (column, represent) in self.fields.items()]
+
+        with timed_serialization():
+            return [
+                {field: row[column] if represent is None or row[column] is None else represent(row[column])
+                 for field, column, represent in fields}
+                for row in rows
+            ]
+
+
+class PlaySerializer(TimedRepresentationMixin, ModelSerializer):
+    # Stored as integer basis points and cents by Play's fee and price setters
+    fee = DecimalField(max_digits=8, decimal_places=4, min_value=0, required=False)
+    price = DecimalField(max_digits=12, decimal_places=2, min_value=0, required=False)
+
     class Meta:
         model = Play
         fields = ('uuid', 'name', 'fee', 'price', 'total_accents')
         read_only_fields = ('uuid', )
+        extra_kwargs = {'total_accents': {'min_value': 0}}
 
+    def validate_total_accents(self, value):
+        if self.instance is None:
+            return value
 
-class PlayFinancialDetailSerializer(ModelSerializer):
-    class Meta:
-        model = Play
+        if value < self.instance.reserved_accents + self.instance.held_accents:
+            raise ValidationError('Ensure this value is greater than or equal to the {} reserved and {} held accents.'
+                                  .format(self.instance.reserved_accents, self.instance.held_accents))
+
+        # Read off the (play, seat) unique index
+        last_reserved_seat = self.instance.reservations.aggregate(last_seat=Max('seat'))['last_seat']
+
+        if last_reserved_seat is not None and value <= last_reserved_seat:
+            raise ValidationError('Ensure this value is greater than {}, the highest reserved seat.'.format(
+                last_reserved_seat))
+
+        return value
+
+
+class PlayFinancialDetailSerializer(PlaySerializer):
+    class Meta(PlaySerializer.Meta):
         fields = ('uuid', 'name', 'fee', 'price', 'total_accents',
                   'amount_of_available_accents', 'revenue', 'total_fee')
         read_only_fields = ('uuid', 'amount_of_available_accents', 'revenue', 'total_fee')
 
 
-class ReservationSerializer(ModelSerializer):
+class PlayValuesSerializer(ValuesSerializer):
+    fields = {
+        'uuid': ('uuid', str),
+        'name': ('name', None),
+        'fee': ('fee_basis_points', from_basis_points),
+        'price': ('price_cents', from_cents),
+        'total_accents': ('total_accents', None),
+    }
+
+
+class ReservationSerializer(TimedRepresentationMixin, ModelSerializer):
     attendee = PrimaryKeyRelatedField(queryset=Attendee.objects.all())
     play = PrimaryKeyRelatedField(queryset=Play.objects.all())
 
     class Meta:
         model = Reservation
-        fields = ('uuid', 'attendee', 'play')
+        fields = ('uuid', 'attendee', 'play', 'seat')
         read_only_fields = ('uuid', )
+
+    def validate(self, attrs):
+        seat = attrs.get('seat')
+
+        if seat is not None and seat >= attrs['play'].total_accents:
+            raise ValidationError(
+                {'seat': ['Ensure this value is less than or equal to {}.'.format(attrs['play'].total_accents - 1)]})
+
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            return super().create(validated_data)
+        except PlaySoldOut:
+            raise ValidationError({'play': ['This play is sold out.']})
+
+
+class ReservationValuesSerializer(ValuesSerializer):
+    fields = {
+        'uuid': ('uuid', str),
+        'attendee': ('attendee', str),
+        'play': ('play', str),
+        'seat': ('seat', None),
+    }
+
+
+class SeatHoldSerializer(TimedRepresentationMixin, ModelSerializer):
+    attendee = PrimaryKeyRelatedField(queryset=Attendee.objects.all())
+    play = PrimaryKeyRelatedField(queryset=Play.objects.all())
+
+    class Meta:
+        model = SeatHold
+        fields = ('uuid', 'attendee', 'play', 'expires_at')
+        read_only_fields = ('uuid', 'expires_at')
+        # Checked in validate(), where an expired hold, released by SeatHold.objects.hold(), does not count
+        validators = []
+
+    def validate(self, attrs):
+        holds = SeatHold.objects.filter(attendee=attrs['attendee'], play=attrs['play'], expires_at__gt=timezone.now())
+
+        if holds.exists():
+            raise ValidationError({'non_field_errors': ['The fields attendee, play must make a unique set.']})
+
+        if Reservation.objects.filter(attendee=attrs['attendee'], play=attrs['play']).exists():
+            raise ValidationError({'non_field_errors': ['This attendee already has a reservation for this play.']})
+
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            return SeatHold.objects.hold(validated_data['attendee'], validated_data['play'])
+        except PlaySoldOut:
+            raise ValidationError({'play': ['This play is sold out.']})
+
+
+class SeatHoldConfirmSerializer(Serializer):
+    # Validated against the hold being confirmed, passed as the instance
+    seat = IntegerField(min_value=0, required=False)
+
+    def validate_seat(self, value):
+        if value >= self.instance.play.total_accents:
+            raise ValidationError('Ensure this value is less than or equal to {}.'.format(
+                self.instance.play.total_accents - 1))
+
+        if Reservation.objects.filter(play=self.instance.play_id, seat=value).exists():
+            raise ValidationError('This seat is already reserved.')
+
+        return value
+
+
+class ReservationBulkItemSerializer(Serializer):
+    # Only checks the payload shape; attendees and plays are looked up for the whole batch at once
+    attendee = UUIDField()
+    play = UUIDField()
+    seat = IntegerField(min_value=0, required=False)
+
+
+class BoxOfficeFilterSerializer(Serializer):
+    plays = ListField(child=UUIDField(), required=False, allow_empty=False)
+
+
+class PlaySeatMapSerializer(TimedRepresentationMixin, ModelSerializer):
+    # Also the snapshot of the events stream: available_accents is the one its availability events carry
+    available_accents = IntegerField(source='amount_of_available_accents', read_only=True)
+    seats = SerializerMethodField()
+
+    class Meta:
+        model = Play
+        fields = ('uuid', 'total_accents', 'reserved_accents', 'held_accents', 'available_accents', 'seats')
+        read_only_fields = fields
+
+    def get_seats(self, play):
+        taken_seats = play.reservations.values_list('seat', flat=True)
+        return encode_seat_map(play.total_accents, list(taken_seats))
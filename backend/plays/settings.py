@@ -1,6 +1,61 @@
+from datetime import timedelta
+
 
 # Play
 
-PLAY_FEE_PERCENT = 0.1355
+PLAY_FEE_BASIS_POINTS = 1355
 PLAY_TOTAL_ACCENTS = 30
-PLAY_PRICE = 19.99
+PLAY_PRICE_CENTS = 1999
+
+# Pagination
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Exports
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Bulk reservations
+
+BULK_RESERVATION_MAX_ITEMS = 500
+
+# Seat holds: how long a hold keeps its accent, and how many expired holds the sweeper deletes per batch
+
+SEAT_HOLD_DURATION = timedelta(minutes=10)
+SEAT_HOLD_SWEEP_BATCH_SIZE = 500
+
+# Cache
+
+PLAY_CACHE_ALIAS = 'default'
+PLAY_CACHE_TIMEOUT = 60 * 60
+
+# Idempotency keys: how long a response is replayed, and how long a crashed request may hold its key
+
+IDEMPOTENCY_CACHE_ALIAS = 'idempotency'
+IDEMPOTENCY_KEY_TIMEOUT = 24 * 60 * 60
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Play events (server-sent events)
+
+PLAY_EVENTS_HEARTBEAT = 15
+PLAY_EVENTS_QUEUE_SIZE = 100
+
+# Query budgets: most SQL queries a request may run, per URL name and method
+
+QUERY_BUDGETS = {
+    'user-list': {'GET': 1},
+    'user-detail': {'GET': 1},
+    'play-list': {'GET': 1},
+    'play-detail': {'GET': 1},
+    'play-list-async': {'GET': 1},
+    'play-detail-async': {'GET': 1},
+    'play-seat-map': {'GET': 2},
+    'play-events': {'GET': 1},
+    'financial-summary': {'GET': 1},
+    'box-office': {'GET': 1},
+    'reservation-list': {'GET': 1},
+    'reservation-detail': {'GET': 1},
+    'seat-hold-detail': {'GET': 1},
+}
@@ -0,0 +1,78 @@
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from .cache import invalidate_play_financials
+from .events import reset_broker
+from .hashers import reset_hashing_pool
+from .metrics import count_request_queries
+
+from .models import Attendee, Play, SeatHold
+from .throttling import reset_token_buckets, reset_write_slots
+
+
+@receiver(pre_delete, sender=Attendee)
+def release_attendee_reservations(sender, instance, **kwargs):
+    # Through ReservationQuerySet.delete(), which gives their accents back; the cascade then finds nothing left
+    instance.reservations.all().delete()
+
+
+@receiver(pre_delete, sender=Attendee)
+def release_attendee_seat_holds(sender, instance, **kwargs):
+    # Seat holds have no delete signal, so the sweeper deletes them in bulk; the cascade would leave their accents held
+    holds_per_play = defaultdict(list)
+
+    for hold_uuid, play_uuid in instance.seat_holds.values_list('uuid', 'play_id'):
+        holds_per_play[play_uuid].append(hold_uuid)
+
+    SeatHold.objects.release(holds_per_play)
+
+
+@receiver(post_save, sender=Play)
+@receiver(post_delete, sender=Play)
+def invalidate_cached_play(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_play_financials, instance.uuid))
+
+
+@receiver(connection_created)
+def count_connection_queries(sender, connection, **kwargs):
+    # connection_created also fires on reconnections of the same wrapper
+    if count_request_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_request_queries)
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+
+    # On the raw connection: setting it up is not one of the queries of the request that happened to open it
+    for pragma, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute('PRAGMA {} = {}'.format(pragma, value))
+
+
+@receiver(setting_changed)
+def resize_hashing_pool(sender, setting, **kwargs):
+    if setting == 'PASSWORD_HASHING_WORKERS':
+        reset_hashing_pool()
+
+
+@receiver(setting_changed)
+def replace_events_broker(sender, setting, **kwargs):
+    if setting == 'PLAY_EVENTS_BROKER':
+        reset_broker()
+
+
+@receiver(setting_changed)
+def reset_throttling(sender, setting, **kwargs):
+    if setting in ('REST_FRAMEWORK', 'THROTTLE_MAX_CLIENTS'):
+        reset_token_buckets()
+
+    if setting == 'WRITE_ADMISSION_LIMIT':
+        reset_write_slots()
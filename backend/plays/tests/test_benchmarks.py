@@ -0,0 +1,86 @@
+from django.test.testcases import SimpleTestCase, TestCase
+
+from ..benchmarks import compare_reports, percentile, without_throttling
+from ..models import Attendee, Play, Reservation
+from ..seeding import seed_dataset
+from ..settings import PLAY_TOTAL_ACCENTS
+from ..throttling import reset_token_buckets
+
+from .factories import PlayFactory
+
+
+def make_report(p99, max_queries):
+    return {
+        'endpoints': {
+            'play-list': {
+                'latency_ms': {'p99': p99},
+                'requests_per_second': 100.,
+                'queries': {'max': max_queries},
+            },
+        },
+    }
+
+
+class CompareReportsTestCase(SimpleTestCase):
+    def test_percentile_of_sorted_values(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, .5), 51)
+        self.assertEqual(percentile(values, .99), 100)
+        self.assertEqual(percentile([], .99), 0.)
+
+    def test_latency_growth_within_tolerance_is_not_a_regression(self):
+        _, regressions = compare_reports(make_report(10., 1), make_report(11.9, 1), tolerance=.2)
+        self.assertListEqual(regressions, [])
+
+    def test_latency_growth_over_tolerance_is_a_regression(self):
+        _, regressions = compare_reports(make_report(10., 1), make_report(12.1, 1), tolerance=.2)
+        self.assertListEqual(regressions, ['play-list'])
+
+    def test_more_queries_per_request_is_a_regression(self):
+        _, regressions = compare_reports(make_report(10., 1), make_report(10., 2), tolerance=.2)
+        self.assertListEqual(regressions, ['play-list'])
+
+
+class SeedDatasetTestCase(TestCase):
+    def test_seeds_consistent_plays_attendees_and_reservations(self):
+        dataset = seed_dataset(amount_of_plays=3, amount_of_attendees=10, reservations_per_play=4, batch_size=3)
+
+        self.assertEqual(len(dataset.play_uuids), 3)
+        self.assertEqual(len(dataset.attendee_uuids), 10)
+        self.assertEqual(Attendee.objects.count(), 10)
+        self.assertEqual(Reservation.objects.count(), 12)
+        self.assertFalse(Play.objects.with_drifted_counters().exists())
+        self.assertTrue(Play.objects.filter(uuid=dataset.play_uuids[-1]).exists())
+        self.assertEqual(set(Attendee.objects.values_list('uuid', flat=True)), set(dataset.attendee_uuids))
+
+    def test_seeded_plays_have_the_seats_asked_for(self):
+        dataset = seed_dataset(amount_of_plays=2, amount_of_attendees=10, reservations_per_play=4, seats_per_play=6)
+
+        self.assertEqual(dataset.seats_per_play, 6)
+        self.assertEqual(set(Play.objects.values_list('total_accents', 'reserved_accents')), {(6, 4)})
+
+        # A default play unless that is too small for the reservations
+        self.assertEqual(seed_dataset(1, 10, reservations_per_play=4).seats_per_play, PLAY_TOTAL_ACCENTS)
+        self.assertEqual(seed_dataset(1, 100, reservations_per_play=50).seats_per_play, 50)
+
+    def test_seeded_rows_have_distinct_creation_times_in_insertion_order(self):
+        dataset = seed_dataset(amount_of_plays=3, amount_of_attendees=10, reservations_per_play=4, batch_size=3)
+
+        for model in (Attendee, Play, Reservation):
+            created_at = list(model.objects.order_by('uuid').values_list('created_at', flat=True))
+            self.assertEqual(created_at, sorted(set(created_at)))
+
+        self.assertEqual(list(Attendee.objects.order_by('created_at').values_list('uuid', flat=True)),
+                         list(dataset.attendee_uuids))
+
+
+class WithoutThrottlingTestCase(TestCase):
+    def test_benchmark_clients_are_not_rate_limited(self):
+        reset_token_buckets()
+        play_detail_url = '/api/plays/{}/'.format(PlayFactory().uuid)
+
+        with without_throttling():
+            status_codes = {self.client.get(play_detail_url).status_code for _ in range(50)}
+
+        self.assertEqual(status_codes, {200})
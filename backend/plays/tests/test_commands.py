@@ -0,0 +1,108 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.contrib.auth.hashers import check_password
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.testcases import TestCase, TransactionTestCase
+
+from ..models import Attendee, Play, Reservation, SeatHold
+from ..seeding import SEED_PASSWORD
+
+from .factories import AttendeeFactory, PlayFactory, ReservationFactory
+
+
+class RebuildPlayCountersCommandTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.play = PlayFactory()
+        cls.drifted_play = PlayFactory()
+        ReservationFactory(play=cls.play)
+        ReservationFactory(play=cls.drifted_play)
+        ReservationFactory(play=cls.drifted_play)
+
+        Play.objects.filter(uuid=cls.drifted_play.uuid).update(reserved_accents=7)
+
+        cls.held_play = PlayFactory()
+        SeatHold.objects.hold(AttendeeFactory(), cls.held_play)
+        SeatHold.objects.hold(AttendeeFactory(), cls.play)
+        Play.objects.filter(uuid=cls.held_play.uuid).update(held_accents=3)
+
+    def test_check_reports_drifted_counters_without_fixing_them(self):
+        output = StringIO()
+
+        with self.assertRaisesRegex(CommandError, '2 play counter'):
+            call_command('rebuild_play_counters', '--check', stdout=output)
+
+        self.assertIn(str(self.drifted_play.uuid), output.getvalue())
+        self.assertIn('Play {}: counters say 0 reserved and 3 held accents, found 0 reservations and 1 seat holds'
+                      .format(self.held_play.uuid), output.getvalue())
+        self.assertNotIn(str(self.play.uuid), output.getvalue())
+
+        self.drifted_play.refresh_from_db()
+        self.held_play.refresh_from_db()
+        self.assertEqual(self.drifted_play.reserved_accents, 7)
+        self.assertEqual(self.held_play.held_accents, 3)
+
+    def test_rebuild_recounts_every_play(self):
+        call_command('rebuild_play_counters', stdout=StringIO())
+
+        self.play.refresh_from_db()
+        self.drifted_play.refresh_from_db()
+        self.held_play.refresh_from_db()
+        self.assertEqual((self.play.reserved_accents, self.play.held_accents), (1, 1))
+        self.assertEqual((self.drifted_play.reserved_accents, self.drifted_play.held_accents), (2, 0))
+        self.assertEqual((self.held_play.reserved_accents, self.held_play.held_accents), (0, 1))
+
+        call_command('rebuild_play_counters', '--check', stdout=StringIO())
+
+
+class SweepSeatHoldsCommandTestCase(TestCase):
+    def test_sweep_releases_expired_holds(self):
+        play = PlayFactory()
+        SeatHold.objects.hold(AttendeeFactory(), play, duration=timedelta(0))
+        SeatHold.objects.hold(AttendeeFactory(), play)
+        output = StringIO()
+
+        call_command('sweep_seat_holds', '--batch-size', '1', stdout=output)
+
+        self.assertIn('Released 1 expired seat hold(s).', output.getvalue())
+        play.refresh_from_db()
+        self.assertEqual(play.held_accents, 1)
+
+
+class SeedCommandTestCase(TransactionTestCase):
+    # A transaction test case: the command drops and rebuilds indexes, which SQLite refuses inside a transaction
+    def test_seeds_consistent_rows_and_restores_indexes_and_pragmas(self):
+        with connection.cursor() as cursor:
+            synchronous = cursor.execute('PRAGMA synchronous').fetchone()
+
+        output = StringIO()
+        call_command('seed', '--plays', '3', '--attendees', '10', '--reservations-per-play', '4',
+                     '--seats-per-play', '5', '--batch-size', '3', stdout=output, stderr=StringIO())
+
+        self.assertIn('Seeded 35 rows', output.getvalue())
+        self.assertIn('Under the target of 100000 rows/s.', output.getvalue())
+        self.assertEqual(set(Play.objects.values_list('total_accents', flat=True)), {5})
+        self.assertEqual(Attendee.objects.count(), 10)
+        self.assertEqual(Reservation.objects.count(), 12)
+        self.assertEqual(Reservation.objects.values('attendee', 'play').distinct().count(), 12)
+        self.assertFalse(Play.objects.with_drifted_counters().exists())
+        self.assertTrue(check_password(SEED_PASSWORD, Attendee.objects.select_related('user').first().user.password))
+
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA synchronous').fetchone(), synchronous)
+            index_names = {index for index, in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+        for model in (Attendee, Play, Reservation):
+            for index in model._meta.indexes:
+                self.assertIn(index.name, index_names)
+
+    def test_rejects_more_reservations_per_play_than_seats(self):
+        with self.assertRaisesRegex(CommandError, '--seats-per-play'):
+            call_command('seed', '--seats-per-play', '2', '--reservations-per-play', '3', stdout=StringIO())
+
+    def test_rejects_more_reservations_per_play_than_attendees(self):
+        with self.assertRaisesRegex(CommandError, '--attendees'):
+            call_command('seed', '--attendees', '2', '--reservations-per-play', '3', stdout=StringIO())
@@ -0,0 +1,75 @@
+import time
+from threading import Barrier, Thread
+
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import Client
+from django.test.testcases import TransactionTestCase
+from rest_framework import status
+
+from ..models import Play, Reservation
+
+from .factories import AttendeeFactory, PlayFactory
+
+
+class ConcurrentReservationTestCase(TransactionTestCase):
+    total_accents = 10
+    amount_of_clients = 40
+
+    def book(self, barrier, play_uuid, attendee_uuid, client_address, status_codes):
+        # Clients of their own: from one address, most bookings would be rate limited before reaching the database
+        client = Client(REMOTE_ADDR=client_address)
+        reservation_data = {'attendee': attendee_uuid, 'play': play_uuid}
+
+        barrier.wait()
+
+        try:
+            while True:
+                try:
+                    response = client.post('/api/reservations/', data=reservation_data, content_type='application/json')
+                except OperationalError:
+                    # sqlite3 allows a single writer: a locked database means "try again", not "sold out"
+                    time.sleep(0.001)
+                    continue
+
+                if response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                    # Turned away by write admission control, like a locked database
+                    time.sleep(0.001)
+                    continue
+
+                status_codes.append(response.status_code)
+                return
+        finally:
+            connection.close()
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('needs a file backed database: sqlite3 locks a shared in-memory database table by table')
+
+        super().setUp()
+
+    def test_concurrent_bookings_never_oversell_a_play(self):
+        play = PlayFactory(total_accents=self.total_accents)
+        attendees = [AttendeeFactory() for _ in range(self.amount_of_clients)]
+
+        barrier = Barrier(self.amount_of_clients)
+        status_codes = []
+        threads = [
+            Thread(target=self.book, args=(barrier, str(play.uuid), str(attendee.uuid), '10.0.0.{}'.format(index),
+                                           status_codes))
+            for index, attendee in enumerate(attendees)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(status_codes), self.amount_of_clients)
+        self.assertEqual(status_codes.count(status.HTTP_201_CREATED), self.total_accents)
+        self.assertEqual(status_codes.count(status.HTTP_400_BAD_REQUEST), self.amount_of_clients - self.total_accents)
+
+        play = Play.objects.get(uuid=play.uuid)
+        self.assertEqual(play.reserved_accents, self.total_accents)
+        self.assertEqual(Reservation.objects.filter(play=play).count(), self.total_accents)
@@ -0,0 +1,24 @@
+from django.db import connection
+from django.test.testcases import TestCase
+from django.test.utils import override_settings
+
+
+class SqliteTuningTestCase(TestCase):
+    def test_new_connections_get_the_configured_pragmas(self):
+        pragmas = {'synchronous': 'OFF', 'busy_timeout': 1234, 'cache_size': -2048}
+
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            new_connection = connection.copy()
+            new_connection.ensure_connection()
+
+        try:
+            with new_connection.cursor() as cursor:
+                actual_pragmas = {}
+
+                for pragma in pragmas:
+                    cursor.execute('PRAGMA ' + pragma)
+                    actual_pragmas[pragma] = cursor.fetchone()[0]
+        finally:
+            new_connection.close()
+
+        self.assertDictEqual(actual_pragmas, {'synchronous': 0, 'busy_timeout': 1234, 'cache_size': -2048})
@@ -0,0 +1,190 @@
+import asyncio
+import json
+from unittest import mock
+from uuid import uuid4
+
+from django.test.testcases import SimpleTestCase, TestCase
+from rest_framework import status
+
+from ..asgi import PlayEventsRouter
+from ..events import InProcessBroker, Subscription, get_broker, play_channel
+from ..models import Reservation
+from ..views import PlayEventsView
+
+from .factories import AttendeeFactory, PlayFactory, ReservationFactory
+
+
+def parse_event(chunk):
+    name, data = chunk.decode().strip().split('\n')
+    return name[len('event: '):], json.loads(data[len('data: '):])
+
+
+class InProcessBrokerTestCase(SimpleTestCase):
+    def test_publishes_to_the_subscribers_of_a_channel(self):
+        broker = InProcessBroker()
+        subscription = Subscription()
+        noisy_subscription = Subscription()
+        broker.subscribe('play', subscription)
+        broker.subscribe('noisy-play', noisy_subscription)
+
+        broker.publish('play', {'available_accents': 1})
+
+        self.assertEqual(subscription.get(timeout=0), {'available_accents': 1})
+        self.assertIsNone(noisy_subscription.get(timeout=0))
+
+    def test_unsubscribed_channels_have_no_subscribers(self):
+        broker = InProcessBroker()
+        subscription = Subscription()
+        broker.subscribe('play', subscription)
+        broker.unsubscribe('play', subscription)
+
+        self.assertFalse(broker.has_subscribers('play'))
+
+    def test_slow_subscribers_overflow(self):
+        subscription = Subscription()
+
+        with mock.patch.object(subscription.queue, 'maxsize', 1):
+            subscription.put({})
+            subscription.put({})
+
+        self.assertTrue(subscription.overflowed)
+
+
+class SeatChangeEventsTestCase(TestCase):
+    def setUp(self):
+        self.play = PlayFactory(total_accents=3)
+        self.subscription = Subscription()
+        get_broker().subscribe(play_channel(self.play.uuid), self.subscription)
+        super().setUp()
+
+    def tearDown(self):
+        get_broker().unsubscribe(play_channel(self.play.uuid), self.subscription)
+        super().tearDown()
+
+    def test_reservations_publish_their_seat_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = ReservationFactory(play=self.play)
+
+        self.assertEqual(self.subscription.get(timeout=0), {
+            'play': str(self.play.uuid), 'available_accents': 2, 'reserved_seats': [0], 'released_seats': []})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.delete()
+
+        self.assertEqual(self.subscription.get(timeout=0), {
+            'play': str(self.play.uuid), 'available_accents': 3, 'reserved_seats': [], 'released_seats': [0]})
+
+    def test_bulk_reservations_publish_one_event_per_play(self):
+        attendees = AttendeeFactory.create_batch(2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Reservation.objects.bulk_reserve([(attendee.uuid, self.play.uuid, None) for attendee in attendees])
+
+        self.assertEqual(self.subscription.get(timeout=0)['reserved_seats'], [0, 1])
+        self.assertIsNone(self.subscription.get(timeout=0))
+
+    def test_nothing_is_read_for_plays_nobody_listens_to(self):
+        unwatched_play = PlayFactory()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            ReservationFactory(play=unwatched_play)
+
+        with self.assertNumQueries(0):
+            for callback in callbacks:
+                callback()
+
+
+class PlayEventsViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.play = PlayFactory(total_accents=3)
+        cls.events_url = '/api/plays/{}/events/'.format(cls.play.uuid)
+
+    def test_get_returns_an_event_stream(self):
+        response = self.client.get(self.events_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    def test_streams_a_snapshot_then_seat_changes(self):
+        stream = PlayEventsView().stream(self.play.uuid)
+
+        name, snapshot = parse_event(next(stream))
+        self.assertEqual(name, 'snapshot')
+        self.assertEqual(snapshot['reserved_accents'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ReservationFactory(play=self.play)
+
+        name, event = parse_event(next(stream))
+        self.assertEqual(name, 'availability')
+        self.assertEqual(event['available_accents'], 2)
+        self.assertEqual(event['reserved_seats'], [0])
+
+        stream.close()
+        self.assertFalse(get_broker().has_subscribers(play_channel(self.play.uuid)))
+
+    def test_idle_streams_send_keepalives(self):
+        stream = PlayEventsView().stream(self.play.uuid)
+        next(stream)
+
+        with mock.patch('plays.views.PLAY_EVENTS_HEARTBEAT', 0):
+            self.assertEqual(next(stream), b': keepalive\n\n')
+
+        stream.close()
+
+    def test_unknown_play_is_not_found(self):
+        response = self.client.get('/api/plays/{}/events/'.format(uuid4()))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PlayEventsRouterTestCase(TestCase):
+    def setUp(self):
+        self.play = PlayFactory(total_accents=3)
+        self.forwarded_scopes = []
+        self.received = asyncio.Queue()
+        self.sent = asyncio.Queue()
+        super().setUp()
+
+    async def django_application(self, scope, receive, send):
+        self.forwarded_scopes.append(scope)
+
+    def call(self, path):
+        scope = {'type': 'http', 'method': 'GET', 'path': path}
+        router = PlayEventsRouter(self.django_application)
+        return asyncio.ensure_future(router(scope, self.received.get, self.sent.put))
+
+    async def test_streams_play_events_on_the_event_loop(self):
+        stream = self.call('/api/plays/{}/events/'.format(self.play.uuid))
+
+        start = await self.sent.get()
+        self.assertEqual(start['status'], status.HTTP_200_OK)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+
+        name, snapshot = parse_event((await self.sent.get())['body'])
+        self.assertEqual(name, 'snapshot')
+        self.assertEqual(snapshot['total_accents'], 3)
+
+        get_broker().publish(play_channel(self.play.uuid), {'available_accents': 2})
+
+        name, event = parse_event((await self.sent.get())['body'])
+        self.assertEqual(name, 'availability')
+        self.assertEqual(event, {'available_accents': 2})
+
+        await self.received.put({'type': 'http.disconnect'})
+        await stream
+
+        self.assertFalse(get_broker().has_subscribers(play_channel(self.play.uuid)))
+        self.assertEqual(self.forwarded_scopes, [])
+
+    async def test_unknown_play_is_not_found(self):
+        await self.call('/api/plays/{}/events/'.format(uuid4()))
+
+        start = await self.sent.get()
+        self.assertEqual(start['status'], status.HTTP_404_NOT_FOUND)
+
+    async def test_other_requests_go_to_django(self):
+        await self.call('/api/plays/{}/'.format(self.play.uuid))
+
+        self.assertEqual(len(self.forwarded_scopes), 1)
@@ -0,0 +1,72 @@
+from threading import Event
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.test.testcases import SimpleTestCase, TestCase
+from django.test.utils import override_settings
+from rest_framework import status
+
+from ..hashers import hash_password
+from ..models import Attendee
+
+
+CHEAP_ARGON2_PARAMS = {'time_cost': 1, 'memory_cost': 1024, 'parallelism': 1}
+
+# Whatever hasher the test settings prefer
+ARGON2_HASHERS = ['plays.hashers.TunableArgon2PasswordHasher']
+
+
+@override_settings(PASSWORD_HASHERS=ARGON2_HASHERS)
+class TunableArgon2PasswordHasherTestCase(SimpleTestCase):
+    @override_settings(ARGON2_PARAMS=CHEAP_ARGON2_PARAMS)
+    def test_hashes_with_the_costs_from_settings(self):
+        encoded = make_password('xoriugui')
+        decoded = identify_hasher(encoded).decode(encoded)
+
+        self.assertEqual(decoded['time_cost'], 1)
+        self.assertEqual(decoded['memory_cost'], 1024)
+        self.assertEqual(decoded['parallelism'], 1)
+
+    def test_hashes_with_other_costs_must_be_updated(self):
+        with override_settings(ARGON2_PARAMS=CHEAP_ARGON2_PARAMS):
+            encoded = make_password('xoriugui')
+
+        hasher = identify_hasher(encoded)
+        self.assertTrue(check_password('xoriugui', encoded))
+        self.assertTrue(hasher.must_update(encoded))
+
+
+@override_settings(PASSWORD_HASHERS=ARGON2_HASHERS, ARGON2_PARAMS=CHEAP_ARGON2_PARAMS)
+class HashPasswordTestCase(SimpleTestCase):
+    @override_settings(PASSWORD_HASHING_WORKERS=0)
+    def test_hashes_on_the_calling_thread_without_workers(self):
+        self.assertTrue(check_password('xoriugui', hash_password('xoriugui')))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=2)
+    def test_hashes_on_the_pool(self):
+        self.assertTrue(check_password('xoriugui', hash_password('xoriugui')))
+
+
+@override_settings(PASSWORD_HASHERS=ARGON2_HASHERS, ARGON2_PARAMS=CHEAP_ARGON2_PARAMS, PASSWORD_HASHING_WORKERS=1,
+                   PASSWORD_HASHING_TIMEOUT=.05)
+class BusySignupTestCase(TestCase):
+    def test_signup_is_unavailable_while_every_hashing_worker_is_busy(self):
+        release = Event()
+
+        def busy_make_password(raw_password):
+            release.wait()
+            return make_password(raw_password)
+
+        attendee_data = {'username': 'JuãoPáulu', 'email': 'juao.paulu@host.com', 'password': 'xoriugui'}
+
+        with mock.patch('plays.hashers.make_password', busy_make_password):
+            response = self.client.post('/api/attendees/', data=attendee_data)
+
+        release.set()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Attendee.objects.exists())
+
+        response = self.client.post('/api/attendees/', data=attendee_data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
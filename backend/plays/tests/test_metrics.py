@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.test.testcases import SimpleTestCase, TestCase
+from django.test.utils import override_settings
+from rest_framework import status
+
+from ..metrics import MetricsRegistry, QueryBudgetExceeded, QueryCounter, SerializationTimer, registry
+from ..settings import QUERY_BUDGETS
+
+from .factories import PlayFactory
+
+
+class MetricsRegistryTestCase(SimpleTestCase):
+    def test_prometheus_histogram_buckets_are_cumulative(self):
+        metrics_registry = MetricsRegistry()
+        metrics_registry.observe('play-list', .003, 1, .001, .0005, .0002)
+        metrics_registry.observe('play-list', .2, 3, .1, .05, .02)
+        metrics_registry.observe('play-list', 20., 2, .2, .1, .04)
+
+        lines = metrics_registry.render_prometheus().splitlines()
+
+        self.assertIn('plays_requests_total{endpoint="play-list"} 3', lines)
+        self.assertIn('plays_request_duration_seconds_bucket{endpoint="play-list",le="0.005"} 1', lines)
+        self.assertIn('plays_request_duration_seconds_bucket{endpoint="play-list",le="0.25"} 2', lines)
+        self.assertIn('plays_request_duration_seconds_bucket{endpoint="play-list",le="10.0"} 2', lines)
+        self.assertIn('plays_request_duration_seconds_bucket{endpoint="play-list",le="+Inf"} 3', lines)
+        self.assertIn('plays_db_queries_total{endpoint="play-list"} 6', lines)
+        self.assertIn('plays_db_queries_max{endpoint="play-list"} 3', lines)
+
+
+class SerializationTimerTestCase(SimpleTestCase):
+    def test_outermost_representation_is_timed_without_its_queries(self):
+        query_counter = QueryCounter()
+        serialization_timer = SerializationTimer(query_counter)
+
+        with mock.patch('plays.metrics.time.perf_counter', side_effect=[0., 1., 5.]):
+            with serialization_timer.timing():
+                with serialization_timer.timing():
+                    query_counter.seconds += 3.
+
+        self.assertEqual(serialization_timer.seconds, 2.)
+
+
+class RequestMetricsMiddlewareTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        PlayFactory.create_batch(2)
+
+    def setUp(self):
+        registry.reset()
+        super().setUp()
+
+    def test_metrics_endpoint_reports_requests_per_url_name(self):
+        self.client.get('/api/plays/')
+        self.client.get('/api/plays/')
+
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        lines = response.content.decode().splitlines()
+        self.assertIn('plays_requests_total{endpoint="play-list"} 2', lines)
+        self.assertIn('plays_db_queries_total{endpoint="play-list"} 2', lines)
+        self.assertTrue(any(line.startswith('plays_serialize_duration_seconds_total{endpoint="play-list"}')
+                            for line in lines))
+        self.assertTrue(any(line.startswith('plays_encode_duration_seconds_total{endpoint="play-list"}')
+                            for line in lines))
+        self.assertGreater(registry.endpoints['play-list'].serialize_seconds, 0)
+
+    async def test_queries_of_async_views_are_counted(self):
+        await self.async_client.get('/api/async/plays/')
+
+        metrics = registry.endpoints['play-list-async']
+        self.assertEqual(metrics.requests, 1)
+        self.assertEqual(metrics.queries, 1)
+
+    def test_unresolved_urls_are_not_recorded(self):
+        self.client.get('/api/nowhere/')
+        self.assertEqual(registry.endpoints, {})
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_strict_mode_fails_requests_over_their_query_budget(self):
+        with mock.patch.dict(QUERY_BUDGETS, {'play-list': {'GET': 0}}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/plays/')
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_requests_over_their_query_budget_are_logged(self):
+        with mock.patch.dict(QUERY_BUDGETS, {'play-list': {'GET': 0}}):
+            with self.assertLogs('plays.middleware', level='WARNING') as logs:
+                response = self.client.get('/api/plays/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('GET play-list ran 1 queries, over its budget of 0', logs.output[0])
@@ -1,8 +1,14 @@
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import connection, transaction
 from django.db.utils import IntegrityError
 from django.test.testcases import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from ..models import Play, Reservation
-from ..settings import PLAY_FEE_PERCENT, PLAY_PRICE, PLAY_TOTAL_ACCENTS
+from ..models import Play, PlaySoldOut, Reservation, SeatHold, SeatHoldExpired
+from ..settings import PLAY_FEE_BASIS_POINTS, PLAY_PRICE_CENTS, PLAY_TOTAL_ACCENTS
 
 from .factories import AttendeeFactory, PlayFactory, ReservationFactory
 
@@ -13,8 +19,8 @@ class PlayTestCase(TestCase):
         persisted_play = Play.objects.get(uuid=play.uuid)
 
         self.assertEqual(persisted_play.name, play.name)
-        self.assertEqual(persisted_play.fee, PLAY_FEE_PERCENT)
-        self.assertEqual(persisted_play.price, PLAY_PRICE)
+        self.assertEqual(persisted_play.fee_basis_points, PLAY_FEE_BASIS_POINTS)
+        self.assertEqual(persisted_play.price_cents, PLAY_PRICE_CENTS)
         self.assertEqual(persisted_play.total_accents, PLAY_TOTAL_ACCENTS)
 
     def test_property_amount_of_available_accents(self):
@@ -25,69 +31,171 @@ class PlayTestCase(TestCase):
 
         # First reservation
         ReservationFactory(play=play)
+        play.refresh_from_db()
         expected_amount_of_available_accents = play.total_accents - 1
         self.assertEqual(play.amount_of_available_accents, expected_amount_of_available_accents)
 
         # Second reservation
         ReservationFactory(play=play)
+        play.refresh_from_db()
         expected_amount_of_available_accents = play.total_accents - 2
         self.assertEqual(play.amount_of_available_accents, expected_amount_of_available_accents)
 
     def test_property_revenue(self):
-        price = 11.1
+        price = Decimal('11.10')
         play = PlayFactory(price=price)
 
-        expected_revenue = 0.
+        expected_revenue = 0
         self.assertEqual(play.revenue, expected_revenue)
 
         # Increasing revenue
 
         first_reservation = ReservationFactory(play=play)
+        play.refresh_from_db()
         expected_revenue = price
         self.assertEqual(play.revenue, expected_revenue)
 
         second_reservation = ReservationFactory(play=play)
+        play.refresh_from_db()
         expected_revenue = price * 2
         self.assertEqual(play.revenue, expected_revenue)
 
         # Decreasing revenue
 
         Reservation.objects.get(uuid=first_reservation.uuid).delete()
+        play.refresh_from_db()
         expected_revenue = price
         self.assertEqual(play.revenue, expected_revenue)
 
         Reservation.objects.get(uuid=second_reservation.uuid).delete()
-        expected_revenue = 0.
+        play.refresh_from_db()
+        expected_revenue = 0
         self.assertEqual(play.revenue, expected_revenue)
 
     def test_property_total_fee(self):
-        price = 10.
-        fee = 0.1
+        price = Decimal('10.00')
+        fee = Decimal('0.1')
         play = PlayFactory(price=price, fee=fee)
 
-        expected_total_fee = 0.
+        expected_total_fee = 0
         self.assertEqual(play.total_fee, expected_total_fee)
 
         # Increasing revenue
 
         first_reservation = ReservationFactory(play=play)
+        play.refresh_from_db()
         expected_total_fee = price * fee
         self.assertEqual(play.total_fee, expected_total_fee)
 
         second_reservation = ReservationFactory(play=play)
+        play.refresh_from_db()
         expected_total_fee = price * 2 * fee
         self.assertEqual(play.total_fee, expected_total_fee)
 
         # Decreasing revenue
 
         Reservation.objects.get(uuid=first_reservation.uuid).delete()
+        play.refresh_from_db()
         expected_total_fee = price * fee
         self.assertEqual(play.total_fee, expected_total_fee)
 
         Reservation.objects.get(uuid=second_reservation.uuid).delete()
-        expected_total_fee = 0.
+        play.refresh_from_db()
+        expected_total_fee = 0
         self.assertEqual(play.total_fee, expected_total_fee)
 
+    def test_financial_properties_read_the_reserved_accents_counter(self):
+        play = PlayFactory()
+        ReservationFactory(play=play)
+        ReservationFactory(play=play)
+        ReservationFactory(play=PlayFactory())
+
+        persisted_play = Play.objects.get(uuid=play.uuid)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(persisted_play.amount_of_reserved_accents, 2)
+            self.assertEqual(persisted_play.amount_of_available_accents, play.total_accents - 2)
+            self.assertEqual(persisted_play.revenue, play.price * 2)
+            self.assertEqual(persisted_play.total_fee,
+                             (play.price * 2 * play.fee).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+    def test_saving_a_stale_instance_keeps_the_counters(self):
+        play = PlayFactory()
+        stale_play = Play.objects.get(uuid=play.uuid)
+        ReservationFactory.create_batch(2, play=play)
+        SeatHold.objects.hold(AttendeeFactory(), play)
+
+        stale_play.name = 'Renamed'
+        stale_play.save()
+
+        play.refresh_from_db()
+        self.assertEqual((play.name, play.reserved_accents, play.held_accents), ('Renamed', 2, 1))
+
+    def test_money_is_exact(self):
+        play = PlayFactory(price=19.99, fee=0.1355, total_accents=1000)
+        self.assertEqual(play.price_cents, 1999)
+        self.assertEqual(play.fee_basis_points, 1355)
+
+        play.reserved_accents = 1000
+
+        self.assertEqual(play.revenue, Decimal('19990.00'))
+        self.assertEqual(play.total_fee, Decimal('2708.65'))
+
+    def test_fees_are_rounded_half_up_to_the_cent(self):
+        play = PlayFactory(price=Decimal('0.05'), fee=Decimal('0.1'))
+        ReservationFactory(play=play)
+        play.refresh_from_db()
+
+        self.assertEqual(play.total_fee, Decimal('0.01'))
+
+    def test_sql_financials_match_the_properties(self):
+        prices_and_fees = (
+            (Decimal('19.99'), Decimal('0.1355')),
+            (Decimal('0.05'), Decimal('0.1')),
+            (Decimal('7.77'), 0),
+        )
+
+        for price, fee in prices_and_fees:
+            play = PlayFactory(price=price, fee=fee)
+            ReservationFactory.create_batch(3, play=play)
+
+        for play in Play.objects.with_financials():
+            self.assertEqual(play.revenue_cents, play.revenue * 100)
+            self.assertEqual(play.total_fee_cents, play.total_fee * 100)
+
+    def test_financial_summary_totals_every_play_in_a_single_query(self):
+        plays = [PlayFactory(price=Decimal('19.99')), PlayFactory(price=Decimal('10.01')), PlayFactory()]
+        ReservationFactory.create_batch(3, play=plays[0])
+        ReservationFactory.create_batch(2, play=plays[1])
+
+        with self.assertNumQueries(1):
+            summary = Play.objects.financial_summary()
+
+        for play in plays:
+            play.refresh_from_db()
+
+        self.assertDictEqual(summary, {
+            'plays': 3,
+            'reserved_accents': 5,
+            'revenue': Decimal('79.99'),
+            'total_fee': sum(play.total_fee for play in plays),
+        })
+
+    def test_financial_summary_without_plays(self):
+        self.assertDictEqual(Play.objects.financial_summary(), {
+            'plays': 0, 'reserved_accents': 0, 'revenue': Decimal(0), 'total_fee': Decimal(0)})
+
+    def test_database_refuses_invalid_counters(self):
+        play = PlayFactory(total_accents=1)
+
+        for reserved_accents in (2, -1):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                Play.objects.filter(uuid=play.uuid).update(reserved_accents=reserved_accents)
+
+    def test_database_refuses_negative_money(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Play.objects.filter(uuid=PlayFactory().uuid).update(price_cents=-1)
+
 
 class ReservationTestCase(TestCase):
     def test_persistence(self):
@@ -107,3 +215,221 @@ class ReservationTestCase(TestCase):
 
         with self.assertRaisesRegex(IntegrityError, expected_error_message):
             Reservation.objects.create(attendee=attendee, play=play)
+
+    def test_reservation_takes_and_releases_play_accents(self):
+        play = PlayFactory(total_accents=2)
+
+        first_reservation = ReservationFactory(play=play)
+        ReservationFactory(play=play)
+
+        play.refresh_from_db()
+        self.assertEqual(play.reserved_accents, 2)
+
+        Reservation.objects.get(uuid=first_reservation.uuid).delete()
+
+        play.refresh_from_db()
+        self.assertEqual(play.reserved_accents, 1)
+
+    def test_play_cant_have_more_reservations_than_total_accents(self):
+        play = PlayFactory(total_accents=1)
+        ReservationFactory(play=play)
+
+        with self.assertRaises(PlaySoldOut):
+            ReservationFactory(play=play)
+
+        self.assertEqual(play.reservations.count(), 1)
+
+        play.refresh_from_db()
+        self.assertEqual(play.reserved_accents, 1)
+
+    def test_deleting_an_attendee_releases_the_accents_of_its_reservations(self):
+        attendee = AttendeeFactory()
+        first_play = PlayFactory()
+        second_play = PlayFactory()
+        ReservationFactory(attendee=attendee, play=first_play)
+        ReservationFactory(attendee=attendee, play=second_play)
+        ReservationFactory(play=second_play)
+
+        attendee.delete()
+
+        first_play.refresh_from_db()
+        second_play.refresh_from_db()
+        self.assertEqual(first_play.reserved_accents, 0)
+        self.assertEqual(second_play.reserved_accents, 1)
+
+    def test_deleting_reservations_releases_their_accents_once_per_play(self):
+        first_play, second_play = PlayFactory.create_batch(2)
+        ReservationFactory.create_batch(5, play=first_play)
+        ReservationFactory.create_batch(3, play=second_play)
+
+        # The seats of the reservations, then within a savepoint a delete and an update per play
+        with self.assertNumQueries(1 + 2 + 2 * 2):
+            deleted = Reservation.objects.all().delete()
+
+        self.assertEqual(deleted, (8, {'plays.Reservation': 8}))
+        first_play.refresh_from_db()
+        second_play.refresh_from_db()
+        self.assertEqual((first_play.reserved_accents, second_play.reserved_accents), (0, 0))
+
+    def test_reservation_takes_the_first_free_seat_when_none_is_chosen(self):
+        play = PlayFactory(total_accents=3)
+
+        first_reservation = ReservationFactory(play=play)
+        second_reservation = ReservationFactory(play=play)
+        self.assertEqual(first_reservation.seat, 0)
+        self.assertEqual(second_reservation.seat, 1)
+
+        first_reservation.delete()
+
+        self.assertEqual(ReservationFactory(play=play).seat, 0)
+        self.assertEqual(ReservationFactory(play=play).seat, 2)
+
+    def test_lowest_free_seats_are_read_from_the_runs_between_taken_seats(self):
+        play = PlayFactory(total_accents=10)
+
+        self.assertEqual(Reservation.objects.lowest_free_seats(play.uuid, play.total_accents, 3), [0, 1, 2])
+
+        for seat in (1, 2, 5, 9):
+            ReservationFactory(play=play, seat=seat)
+
+        self.assertEqual(Reservation.objects.lowest_free_seats(play.uuid, play.total_accents, 1), [0])
+        self.assertEqual(Reservation.objects.lowest_free_seats(play.uuid, play.total_accents, 4), [0, 3, 4, 6])
+        self.assertEqual(Reservation.objects.lowest_free_seats(play.uuid, play.total_accents, 10), [0, 3, 4, 6, 7, 8])
+
+    def test_reservation_seat_lookup_does_not_read_every_taken_seat(self):
+        play = PlayFactory(total_accents=50)
+        ReservationFactory.create_batch(40, play=play)
+
+        with CaptureQueriesContext(connection) as queries:
+            reservation = ReservationFactory(play=play)
+
+        self.assertEqual(reservation.seat, 40)
+        # The first taken seat, then the first run of free seats after a taken one: a row each
+        seat_queries = [query['sql'] for query in queries if query['sql'].startswith('SELECT')
+                        and 'FROM "plays_reservation"' in query['sql']]
+        self.assertEqual(len(seat_queries), 2)
+        self.assertTrue(all(sql.endswith('LIMIT 1') for sql in seat_queries))
+
+    def test_two_reservations_cant_take_the_same_seat_of_a_play(self):
+        play = PlayFactory()
+        ReservationFactory(play=play, seat=5)
+        ReservationFactory(seat=5)
+
+        expected_error_message = 'UNIQUE constraint failed: plays_reservation.play_id, plays_reservation.seat'
+
+        with self.assertRaisesRegex(IntegrityError, expected_error_message):
+            ReservationFactory(play=play, seat=5)
+
+
+class SeatHoldTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.play = PlayFactory(total_accents=2)
+        cls.attendee = AttendeeFactory()
+
+    def test_hold_takes_an_accent(self):
+        hold = SeatHold.objects.hold(self.attendee, self.play)
+
+        self.play.refresh_from_db()
+        self.assertEqual(self.play.held_accents, 1)
+        self.assertEqual(self.play.amount_of_available_accents, 1)
+        self.assertFalse(hold.is_expired)
+
+    def test_holds_and_reservations_share_the_accents(self):
+        SeatHold.objects.hold(self.attendee, self.play)
+        ReservationFactory(play=self.play)
+
+        with self.assertRaises(PlaySoldOut):
+            SeatHold.objects.hold(AttendeeFactory(), self.play)
+
+        with self.assertRaises(PlaySoldOut):
+            ReservationFactory(play=self.play)
+
+    def test_confirm_turns_the_hold_into_a_reservation(self):
+        hold = SeatHold.objects.hold(self.attendee, self.play)
+
+        reservation = hold.confirm(seat=1)
+
+        self.play.refresh_from_db()
+        self.assertEqual((self.play.reserved_accents, self.play.held_accents), (1, 0))
+        self.assertEqual((reservation.attendee_id, reservation.play_id, reservation.seat),
+                         (self.attendee.uuid, self.play.uuid, 1))
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_reserving_directly_uses_up_the_attendee_hold(self):
+        hold = SeatHold.objects.hold(self.attendee, self.play)
+        ReservationFactory(play=self.play)
+
+        ReservationFactory(attendee=self.attendee, play=self.play)
+
+        self.play.refresh_from_db()
+        self.assertEqual((self.play.reserved_accents, self.play.held_accents), (2, 0))
+        self.assertFalse(SeatHold.objects.exists())
+
+        with self.assertRaises(SeatHoldExpired):
+            hold.confirm()
+
+    def test_bulk_reserving_uses_up_the_attendee_holds(self):
+        SeatHold.objects.hold(self.attendee, self.play)
+        ReservationFactory(play=self.play)
+
+        results = Reservation.objects.bulk_reserve([
+            (self.attendee.uuid, self.play.uuid, None),
+            (AttendeeFactory().uuid, self.play.uuid, None),
+        ])
+
+        self.assertIsInstance(results[0], Reservation)
+        self.assertEqual(results[1], {'play': ['This play is sold out.']})
+        self.play.refresh_from_db()
+        self.assertEqual((self.play.reserved_accents, self.play.held_accents), (2, 0))
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_confirm_refuses_an_expired_hold(self):
+        hold = SeatHold.objects.hold(self.attendee, self.play, duration=timedelta(0))
+
+        with self.assertRaises(SeatHoldExpired):
+            hold.confirm()
+
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_an_expired_hold_can_be_taken_again_before_the_sweep(self):
+        expired_hold = SeatHold.objects.hold(self.attendee, self.play, duration=timedelta(0))
+
+        hold = SeatHold.objects.hold(self.attendee, self.play)
+
+        self.assertEqual(list(SeatHold.objects.all()), [hold])
+        self.assertNotEqual(hold.uuid, expired_hold.uuid)
+        self.play.refresh_from_db()
+        self.assertEqual(self.play.held_accents, 1)
+
+    def test_sweep_releases_expired_holds_only(self):
+        for play in PlayFactory.create_batch(2):
+            for _ in range(3):
+                SeatHold.objects.hold(AttendeeFactory(), play, duration=timedelta(0))
+        SeatHold.objects.hold(self.attendee, self.play)
+
+        with self.assertNumQueries(1 + 2 * 4 + 1):
+            # One batch of expired holds, then per play a delete and an update within a savepoint, and the empty batch
+            # that ends the sweep
+            swept = SeatHold.objects.sweep_expired(now=timezone.now(), batch_size=10)
+
+        self.assertEqual(swept, 6)
+        self.assertEqual(list(SeatHold.objects.values_list('attendee_id', flat=True)), [self.attendee.uuid])
+        self.assertEqual(Play.objects.filter(held_accents__gt=0).get(), self.play)
+
+    def test_release_does_not_give_an_accent_back_twice(self):
+        hold = SeatHold.objects.hold(self.attendee, self.play)
+
+        self.assertEqual(hold.release(), 1)
+        self.assertEqual(hold.release(), 0)
+
+        self.play.refresh_from_db()
+        self.assertEqual(self.play.held_accents, 0)
+
+    def test_deleting_the_attendee_releases_its_holds(self):
+        SeatHold.objects.hold(self.attendee, self.play)
+
+        self.attendee.user.delete()
+
+        self.play.refresh_from_db()
+        self.assertEqual(self.play.held_accents, 0)
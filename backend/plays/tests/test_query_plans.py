@@ -0,0 +1,65 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test.testcases import TestCase
+from django.utils import timezone
+
+from ..models import Attendee, Play, Reservation, SeatHold
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Reads SQLite EXPLAIN QUERY PLAN output')
+class QueryPlanTestCase(TestCase):
+    # The plan of an empty table is the same as a full one: SQLite has no statistics until ANALYZE
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+
+        self.assertRegex(plan, r'USING (COVERING )?INDEX {}\b'.format(index_name))
+        self.assertNotIn('USE TEMP B-TREE', plan)
+
+    def test_seats_of_a_play_are_read_from_the_play_seat_index(self):
+        index_name = self.unique_index_name(Reservation, ('play_id', 'seat'))
+        self.assertUsesIndex(Reservation.objects.filter(play_id=Play().uuid).values_list('seat'), index_name)
+
+    def test_reservations_of_a_play_by_time(self):
+        reservations = Reservation.objects.filter(play_id=Play().uuid).order_by('created_at', 'uuid')
+        self.assertUsesIndex(reservations, 'plays_reservation_play_idx')
+
+    def test_reservations_of_an_attendee_by_time(self):
+        reservations = Reservation.objects.filter(attendee_id=Attendee().uuid).order_by('created_at', 'uuid')
+        self.assertUsesIndex(reservations, 'plays_reservation_attendee_idx')
+
+    def test_reservation_pages(self):
+        self.assertUsesIndex(Reservation.objects.order_by('created_at', 'uuid')[:100], 'plays_reservation_created_idx')
+
+    def test_play_pages(self):
+        self.assertUsesIndex(Play.objects.order_by('created_at', 'uuid')[:100], 'plays_play_created_idx')
+
+    def test_attendee_pages(self):
+        attendees = Attendee.objects.select_related('user').order_by('created_at', 'uuid')[:100]
+        self.assertUsesIndex(attendees, 'plays_attendee_created_idx')
+
+    def test_free_seat_runs_are_read_from_the_play_seat_index(self):
+        index_name = self.unique_index_name(Reservation, ('play_id', 'seat'))
+        self.assertUsesIndex(Reservation.objects.free_seat_runs(Play().uuid, 30)[:1], index_name)
+
+    def test_bulk_reservation_lookups(self):
+        play_uuids = [Play().uuid, Play().uuid]
+        reserved_pairs = Reservation.objects.filter(
+            attendee_id__in=[Attendee().uuid, Attendee().uuid], play_id__in=play_uuids).values_list(
+            'attendee_id', 'play_id')
+        taken_seats = Reservation.objects.filter(play_id__in=play_uuids, seat__in=[0, 1]).values_list('play_id', 'seat')
+
+        self.assertUsesIndex(reserved_pairs, self.unique_index_name(Reservation, ('attendee_id', 'play_id')))
+        self.assertUsesIndex(taken_seats, self.unique_index_name(Reservation, ('play_id', 'seat')))
+
+    def test_expired_seat_hold_batches(self):
+        expired = SeatHold.objects.filter(expires_at__lte=timezone.now()).order_by('expires_at').values_list(
+            'uuid', 'play_id')[:500]
+        self.assertUsesIndex(expired, 'plays_seathold_expires_idx')
+
+    def unique_index_name(self, model, columns):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+
+        return next(name for name, constraint in constraints.items()
+                    if constraint['unique'] and constraint['index'] and tuple(constraint['columns']) == columns)
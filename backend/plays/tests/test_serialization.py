@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock, skipIf
+from uuid import uuid4
+
+from django.test.testcases import SimpleTestCase, TestCase
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+
+from .. import renderers
+from ..models import Play, Reservation
+from ..renderers import FastJSONRenderer
+from ..serializers import PlaySerializer, PlayValuesSerializer, ReservationSerializer, ReservationValuesSerializer
+
+from .factories import PlayFactory, ReservationFactory
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    data = {
+        'uuid': uuid4(),
+        'name': 'Peça     \U0001f3ad "quoted"',
+        'price': Decimal('19.99'),
+        'fee': Decimal('0.1355'),
+        'created_at': datetime(2020, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+        'seats': (1, 2, None),
+        'ratio': .1 + .2,
+        'errors': {'play': [ErrorDetail('This play is sold out.', code='invalid')]},
+        1: True,
+    }
+
+    @skipIf(renderers.orjson is None, 'orjson is not installed')
+    def test_renders_the_bytes_json_renderer_renders(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_falls_back_to_json_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_falls_back_to_json_for_indented_output(self):
+        self.assertEqual(FastJSONRenderer().render(self.data, 'application/json; indent=4'),
+                         JSONRenderer().render(self.data, 'application/json; indent=4'))
+
+    def test_falls_back_to_json_for_integers_orjson_refuses(self):
+        self.assertEqual(FastJSONRenderer().render({'big': 2 ** 70}), b'{"big":1180591620717411303424}')
+
+    def test_renders_none_as_an_empty_body(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class ValuesSerializerTestCase(TestCase):
+    def test_play_rows_render_like_play_instances(self):
+        PlayFactory(price=Decimal('19.99'), fee=Decimal('0.1355'))
+        PlayFactory(price=Decimal('1000'), fee=Decimal('0.1'), name='Peça')
+
+        plays = Play.objects.order_by('created_at')
+        rows = plays.values(*PlayValuesSerializer().columns)
+
+        self.assertEqual(FastJSONRenderer().render(PlayValuesSerializer().to_representation(rows)),
+                         JSONRenderer().render(PlaySerializer(plays, many=True).data))
+
+    def test_reservation_rows_render_like_reservation_instances(self):
+        ReservationFactory.create_batch(2)
+
+        reservations = Reservation.objects.order_by('created_at')
+        rows = reservations.values(*ReservationValuesSerializer().columns)
+
+        self.assertEqual(FastJSONRenderer().render(ReservationValuesSerializer().to_representation(rows)),
+                         JSONRenderer().render(ReservationSerializer(reservations, many=True).data))
+
+    def test_sparse_fields_keep_the_serializer_order(self):
+        values_serializer = PlayValuesSerializer(fields=['total_accents', 'uuid'])
+
+        self.assertListEqual(values_serializer.columns, ['uuid', 'total_accents'])
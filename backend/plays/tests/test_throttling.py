@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.test.testcases import SimpleTestCase, TestCase
+from django.test.utils import override_settings
+from rest_framework import status
+
+from ..models import Reservation
+from ..throttling import TokenBuckets, get_write_slots, reset_token_buckets
+
+from .factories import AttendeeFactory, PlayFactory
+
+
+def throttle_rates(**rates):
+    return dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES=dict(
+        settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates))
+
+
+class TokenBucketsTestCase(SimpleTestCase):
+    def test_allows_a_burst_then_the_rate(self):
+        buckets = TokenBuckets(capacity=2, refill_rate=1, max_keys=10)
+
+        self.assertEqual([buckets.take('client', now=0) for _ in range(3)], [0, 0, 1])
+        self.assertEqual(buckets.take('client', now=.5), .5)
+        self.assertEqual(buckets.take('client', now=1), 0)
+
+    def test_keys_have_their_own_buckets(self):
+        buckets = TokenBuckets(capacity=1, refill_rate=1, max_keys=10)
+
+        self.assertEqual(buckets.take('client', now=0), 0)
+        self.assertEqual(buckets.take('other client', now=0), 0)
+        self.assertEqual(buckets.take('client', now=0), 1)
+
+    def test_refilled_buckets_are_dropped(self):
+        buckets = TokenBuckets(capacity=2, refill_rate=1, max_keys=10)
+        buckets.take('idle client', now=0)
+        buckets.take('client', now=1)
+
+        buckets.take('client', now=2)
+
+        self.assertEqual(len(buckets), 1)
+
+    def test_least_recently_seen_keys_are_dropped_past_max_keys(self):
+        buckets = TokenBuckets(capacity=1, refill_rate=.001, max_keys=2)
+        buckets.take('first', now=0)
+        buckets.take('second', now=0)
+        buckets.take('first', now=0)
+
+        buckets.take('third', now=0)
+
+        self.assertEqual(list(buckets.buckets), ['first', 'third'])
+
+
+class TokenBucketThrottleTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.play = PlayFactory()
+
+    def setUp(self):
+        reset_token_buckets()
+        super().setUp()
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(plays='2/m'))
+    def test_play_reads_are_throttled_per_client(self):
+        play_detail_url = '/api/plays/{}/'.format(self.play.uuid)
+
+        for _ in range(2):
+            self.assertEqual(self.client.get(play_detail_url).status_code, status.HTTP_200_OK)
+
+        response = self.client.get(play_detail_url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+
+        other_client_response = self.client.get(play_detail_url, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(other_client_response.status_code, status.HTTP_200_OK)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(plays='2/m'))
+    def test_async_play_reads_share_the_play_detail_bucket(self):
+        self.assertEqual(self.client.get('/api/plays/{}/'.format(self.play.uuid)).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/async/plays/{}/'.format(self.play.uuid)).status_code,
+                         status.HTTP_200_OK)
+
+        response = self.client.get('/api/async/plays/{}/'.format(self.play.uuid))
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(response.json(), self.client.get('/api/plays/{}/'.format(self.play.uuid)).json())
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(reservations='1/m'))
+    def test_reservations_are_throttled_per_client_whatever_the_attendee(self):
+        attendee, other_attendee = AttendeeFactory.create_batch(2)
+
+        response = self.client.post('/api/reservations/', {'attendee': str(attendee.uuid), 'play': str(self.play.uuid)})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post('/api/reservations/', {'attendee': str(other_attendee.uuid),
+                                                           'play': str(self.play.uuid)})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        response = self.client.post('/api/reservations/', {'attendee': str(other_attendee.uuid),
+                                                           'play': str(self.play.uuid)}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+
+@override_settings(WRITE_ADMISSION_LIMIT=1, WRITE_ADMISSION_TIMEOUT=0)
+class WriteAdmissionTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.play = PlayFactory()
+        cls.reservation_data = {'attendee': str(AttendeeFactory().uuid), 'play': str(cls.play.uuid)}
+
+    def setUp(self):
+        reset_token_buckets()
+        super().setUp()
+
+    def test_writes_beyond_the_limit_get_a_503(self):
+        write_slots = get_write_slots()
+        write_slots.acquire()
+
+        try:
+            response = self.client.post('/api/reservations/', self.reservation_data)
+        finally:
+            write_slots.release()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_reads_are_admitted_while_writes_are_saturated(self):
+        write_slots = get_write_slots()
+        write_slots.acquire()
+
+        try:
+            response = self.client.get('/api/plays/{}/'.format(self.play.uuid))
+        finally:
+            write_slots.release()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_writes_give_their_slot_back(self):
+        self.assertEqual(self.client.post('/api/reservations/', self.reservation_data).status_code,
+                         status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post('/api/reservations/', self.reservation_data).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+        self.assertTrue(get_write_slots().acquire(blocking=False))
+        get_write_slots().release()
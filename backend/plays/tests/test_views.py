@@ -1,18 +1,34 @@
+import csv
+import json
+from base64 import b64decode
+from datetime import timedelta
+from hashlib import sha256
+from unittest import mock
+from decimal import Decimal
+from uuid import uuid4
+
 from django.contrib.auth.hashers import check_password
+from django.core.cache import caches
+from django.db import connection
 from django.test.testcases import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from rest_framework import status
 
-from ..models import Attendee, Play, Reservation
+from ..idempotency import idempotency_key
+from ..models import Attendee, Play, Reservation, SeatHold
+from ..seeding import seed_dataset
+from ..settings import IDEMPOTENCY_CACHE_ALIAS, MAX_PAGE_SIZE, PLAY_CACHE_ALIAS
+from ..throttling import reset_token_buckets
 
 from .factories import AttendeeFactory, PlayFactory, ReservationFactory
 
 
 class AttendeeDetailViewTestCase(TestCase):
-    def setUp(self):
-        self.attendee = AttendeeFactory()
-        self.noisy_attendee = AttendeeFactory()
-        self.attendees_detail_url = '/api/attendees/' + str(self.attendee.uuid) + '/'
-        super().setUp()
+    @classmethod
+    def setUpTestData(cls):
+        cls.attendee = AttendeeFactory()
+        cls.noisy_attendee = AttendeeFactory()
+        cls.attendees_detail_url = '/api/attendees/' + str(cls.attendee.uuid) + '/'
 
     def test_get_returns_specified_attendee_details(self):
         response = self.client.get(self.attendees_detail_url)
@@ -28,6 +44,10 @@ class AttendeeDetailViewTestCase(TestCase):
 
         self.assertDictEqual(expected_attendee_data, actual_attendee_data)
 
+    def test_get_reads_the_attendee_and_its_user_in_a_single_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(self.attendees_detail_url)
+
 
 class AttendeeListViewTestCase(TestCase):
     def setUp(self):
@@ -41,7 +61,7 @@ class AttendeeListViewTestCase(TestCase):
         response = self.client.get(self.attendees_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        actual_data = response.json()
+        actual_data = response.json()['results']
         expected_data = [
             {
                 'uuid': str(first_attendee.uuid),
@@ -56,6 +76,15 @@ class AttendeeListViewTestCase(TestCase):
         ]
         self.assertListEqual(actual_data, expected_data)
 
+    def test_get_query_count_does_not_grow_with_the_attendees(self):
+        for amount_of_attendees in (10, 990, 9000):
+            seed_dataset(amount_of_plays=0, amount_of_attendees=amount_of_attendees, reservations_per_play=0)
+
+            with self.assertNumQueries(1):
+                response = self.client.get(self.attendees_list_url, {'page_size': MAX_PAGE_SIZE})
+
+            self.assertEqual(len(response.json()['results']), min(Attendee.objects.count(), MAX_PAGE_SIZE))
+
     def test_post_create_an_attendee_and_a_user_with_it(self):
         attendee_data = {
             'username': 'JuãoPáulu',
@@ -76,22 +105,27 @@ class AttendeeListViewTestCase(TestCase):
 
 
 class PlayDetailViewTestCase(TestCase):
-    def setUp(self):
-        self.noisy_play = PlayFactory()
-        self.play = PlayFactory()
-        self.play_data = {
-            'uuid': str(self.play.uuid),
-            'name': self.play.name,
-            'fee': self.play.fee,
-            'price': self.play.price,
-            'total_accents': self.play.total_accents,
-            'amount_of_available_accents': self.play.amount_of_available_accents,
-            'revenue': self.play.revenue,
-            'total_fee': self.play.total_fee,
+    @classmethod
+    def setUpTestData(cls):
+        cls.noisy_play = PlayFactory()
+        cls.play = PlayFactory()
+        cls.play_data = {
+            'uuid': str(cls.play.uuid),
+            'name': cls.play.name,
+            'fee': float(cls.play.fee),
+            'price': float(cls.play.price),
+            'total_accents': cls.play.total_accents,
+            'amount_of_available_accents': cls.play.amount_of_available_accents,
+            'revenue': float(cls.play.revenue),
+            'total_fee': float(cls.play.total_fee),
         }
 
-        self.plays_detail_url = '/api/plays/' + str(self.play.uuid) + '/'
+        cls.plays_detail_url = '/api/plays/' + str(cls.play.uuid) + '/'
 
+    def setUp(self):
+        # The play outlives a test, its cached representation and the client's token bucket must not
+        caches[PLAY_CACHE_ALIAS].clear()
+        reset_token_buckets()
         super().setUp()
 
     def test_get_returns_specified_play_details(self):
@@ -101,14 +135,79 @@ class PlayDetailViewTestCase(TestCase):
         response_data = response.json()
         self.assertDictEqual(response_data, self.play_data)
 
+    def test_get_serves_repeated_requests_from_the_cache(self):
+        self.client.get(self.plays_detail_url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.plays_detail_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertDictEqual(response.json(), self.play_data)
+
+    def test_get_returns_304_when_etag_matches(self):
+        response = self.client.get(self.plays_detail_url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            not_modified_response = self.client.get(self.plays_detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(not_modified_response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified_response['ETag'], etag)
+        self.assertEqual(not_modified_response.content, b'')
+
+    def test_get_reflects_reservation_and_play_changes(self):
+        etag = self.client.get(self.plays_detail_url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = ReservationFactory(play=self.play)
+
+        response = self.client.get(self.plays_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['amount_of_available_accents'], self.play.total_accents - 1)
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.delete()
+
+        response = self.client.get(self.plays_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['amount_of_available_accents'], self.play.total_accents)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.plays_detail_url, data={'name': 'Renamed'}, content_type='application/json')
+
+        self.assertEqual(self.client.get(self.plays_detail_url).json()['name'], 'Renamed')
+
+    # The booking runs inside the request, its queries count against the play detail budget
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_a_miss_racing_a_booking_does_not_cache_the_old_counters(self):
+        stale_play = Play.objects.get(uuid=self.play.uuid)
+
+        def get_object_then_book():
+            # The booking commits, and invalidates, after the miss read the play
+            with self.captureOnCommitCallbacks(execute=True):
+                ReservationFactory(play=self.play)
+
+            return stale_play
+
+        with mock.patch('plays.views.PlayDetailView.get_object', side_effect=get_object_then_book):
+            with self.assertLogs('plays.middleware', level='WARNING') as logs:
+                response = self.client.get(self.plays_detail_url)
+
+        self.assertRegex(logs.output[0], r'GET play-detail ran \d+ queries, over its budget of 1')
+        self.assertEqual(response.json()['amount_of_available_accents'], self.play.total_accents)
+
+        response = self.client.get(self.plays_detail_url)
+        self.assertEqual(response.json()['amount_of_available_accents'], self.play.total_accents - 1)
+
     def test_put_updates_specified_play_writable_fields(self):
         updated_play_data = self.play_data.copy()
 
         # Randomly updates play
 
         updated_play_data['name'] = self.play_data['name'] + 'S'
-        updated_play_data['price'] = self.play_data['price'] + 1.1
-        updated_play_data['fee'] = self.play_data['price'] + 0.1
+        updated_play_data['price'] = round(self.play_data['price'] + 1.1, 2)
+        updated_play_data['fee'] = round(self.play_data['price'] + 0.1, 4)
         updated_play_data['total_accents'] = self.play_data['total_accents']
 
         response = self.client.put(self.plays_detail_url, data=updated_play_data, content_type='application/json')
@@ -120,8 +219,8 @@ class PlayDetailViewTestCase(TestCase):
         persisted_play = Play.objects.get(uuid=updated_play_data['uuid'])
 
         self.assertEqual(persisted_play.name, updated_play_data['name'])
-        self.assertEqual(persisted_play.price, updated_play_data['price'])
-        self.assertEqual(persisted_play.fee, updated_play_data['fee'])
+        self.assertEqual(float(persisted_play.price), updated_play_data['price'])
+        self.assertEqual(float(persisted_play.fee), updated_play_data['fee'])
         self.assertEqual(persisted_play.total_accents, updated_play_data['total_accents'])
 
     def test_patch_updates_specified_play_writable_field(self):
@@ -129,7 +228,7 @@ class PlayDetailViewTestCase(TestCase):
 
         # Randomly updates play
 
-        updated_play_data['price'] = self.play_data['price'] + 1.1
+        updated_play_data['price'] = round(self.play_data['price'] + 1.1, 2)
 
         response = self.client.patch(self.plays_detail_url, data=updated_play_data, content_type='application/json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -139,7 +238,38 @@ class PlayDetailViewTestCase(TestCase):
 
         persisted_play = Play.objects.get(uuid=updated_play_data['uuid'])
 
-        self.assertEqual(persisted_play.price, updated_play_data['price'])
+        self.assertEqual(float(persisted_play.price), updated_play_data['price'])
+
+    def test_patch_of_a_stale_play_keeps_its_counters(self):
+        stale_play = Play.objects.get(uuid=self.play.uuid)
+        ReservationFactory.create_batch(2, play=self.play)
+
+        with mock.patch('plays.views.PlayDetailView.get_object', return_value=stale_play):
+            response = self.client.patch(self.plays_detail_url, data={'name': 'Renamed'},
+                                         content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.play.refresh_from_db()
+        self.assertEqual(self.play.reserved_accents, 2)
+        self.assertEqual(Reservation.objects.filter(play=self.play).count(), 2)
+
+    def test_patch_rejects_fewer_accents_than_the_highest_reserved_seat(self):
+        ReservationFactory(play=self.play, seat=4)
+
+        response = self.client.patch(self.plays_detail_url, data={'total_accents': 4}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(),
+                         {'total_accents': ['Ensure this value is greater than 4, the highest reserved seat.']})
+
+        response = self.client.patch(self.plays_detail_url, data={'total_accents': 5}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_patch_rejects_fewer_accents_than_reserved(self):
+        ReservationFactory.create_batch(2, play=self.play)
+
+        response = self.client.patch(self.plays_detail_url, data={'total_accents': 1}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('total_accents', response.json())
 
     def test_delete_returns_204_and_removes_specified_play_and_its_reservations(self):
         noisy_reservation = ReservationFactory(play=self.noisy_play)
@@ -156,6 +286,16 @@ class PlayDetailViewTestCase(TestCase):
         self.assertIsNotNone(Play.objects.get(uuid=self.noisy_play.uuid))
         self.assertIsNotNone(Reservation.objects.get(uuid=noisy_reservation.uuid))
 
+    def test_delete_cascades_to_reservations_in_bulk(self):
+        ReservationFactory.create_batch(20, play=self.play)
+
+        # The play read, then one delete each for its reservations, its seat holds and itself, whatever their number
+        with self.assertNumQueries(4):
+            response = self.client.delete(self.plays_detail_url)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Reservation.objects.filter(play_id=self.play.uuid).exists())
+
 
 class PlayListViewTestCase(TestCase):
     def setUp(self):
@@ -169,20 +309,20 @@ class PlayListViewTestCase(TestCase):
         response = self.client.get(self.plays_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        actual_data = response.json()
+        actual_data = response.json()['results']
         expected_data = [
             {
                 'uuid': str(first_play.uuid),
                 'name': first_play.name,
-                'fee': first_play.fee,
-                'price': first_play.price,
+                'fee': float(first_play.fee),
+                'price': float(first_play.price),
                 'total_accents': first_play.total_accents,
             },
             {
                 'uuid': str(second_play.uuid),
                 'name': second_play.name,
-                'fee': second_play.fee,
-                'price': second_play.price,
+                'fee': float(second_play.fee),
+                'price': float(second_play.price),
                 'total_accents': second_play.total_accents,
             }
         ]
@@ -205,16 +345,192 @@ class PlayListViewTestCase(TestCase):
         persisted_play = Play.objects.get(uuid=response_play_data['uuid'])
 
         self.assertEqual(persisted_play.name, response_play_data['name'])
-        self.assertEqual(persisted_play.price, response_play_data['price'])
-        self.assertEqual(persisted_play.fee, response_play_data['fee'])
+        self.assertEqual(float(persisted_play.price), response_play_data['price'])
+        self.assertEqual(float(persisted_play.fee), response_play_data['fee'])
         self.assertEqual(persisted_play.total_accents, response_play_data['total_accents'])
 
+    def test_get_filters_by_name_prefix_and_availability(self):
+        hamlet = PlayFactory(name='Hamlet', total_accents=1)
+        PlayFactory(name='Macbeth')
+        ReservationFactory(play=hamlet)
+        hamlet_2 = PlayFactory(name='hamlet 2')
+
+        response = self.client.get(self.plays_list_url, data={'name': 'HAM'})
+        self.assertListEqual([play['uuid'] for play in response.json()['results']],
+                             [str(hamlet.uuid), str(hamlet_2.uuid)])
+
+        response = self.client.get(self.plays_list_url, data={'name': 'ham', 'available': 'true'})
+        self.assertListEqual([play['uuid'] for play in response.json()['results']], [str(hamlet_2.uuid)])
+
+        response = self.client.get(self.plays_list_url, data={'available': 'false'})
+        self.assertListEqual([play['uuid'] for play in response.json()['results']], [str(hamlet.uuid)])
+
+    def test_get_rejects_invalid_filters(self):
+        response = self.client.get(self.plays_list_url, data={'available': 'maybe'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('available', response.json())
+
+    def test_get_returns_and_loads_only_the_requested_fields(self):
+        plays = PlayFactory.create_batch(3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.plays_list_url, data={'fields': 'uuid,price', 'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(response.json()['results'], [
+            {'uuid': str(play.uuid), 'price': float(play.price)} for play in plays[:2]])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"name"', queries[0]['sql'])
+        self.assertNotIn('"fee_basis_points"', queries[0]['sql'])
+
+        response = self.client.get(response.json()['next'])
+        self.assertListEqual(response.json()['results'], [{'uuid': str(plays[2].uuid), 'price': float(plays[2].price)}])
+
+    def test_get_rejects_unknown_fields(self):
+        response = self.client.get(self.plays_list_url, data={'fields': 'uuid,reserved_accents'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertDictEqual(response.json(), {'fields': ['Unknown field(s): reserved_accents.']})
+
+    def test_post_ignores_the_fields_parameter(self):
+        response = self.client.post(self.plays_list_url + '?fields=uuid', data={'name': 'Play Name'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('total_accents', response.json())
+
+
+class FinancialSummaryViewTestCase(TestCase):
+    def test_get_returns_the_totals_of_every_play(self):
+        play = PlayFactory(price=19.99, fee=0.1355)
+        ReservationFactory.create_batch(3, play=play)
+        PlayFactory()
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/financials/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertDictEqual(response.json(), {
+            'plays': 2,
+            'reserved_accents': 3,
+            'revenue': 59.97,
+            'total_fee': 8.13,
+        })
+
+
+class BoxOfficeViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.play = PlayFactory(price=Decimal('19.99'), fee=Decimal('0.1355'), total_accents=10)
+        cls.other_play = PlayFactory(price=Decimal('10.00'), fee=Decimal('0.1'), total_accents=5)
+        cls.empty_play = PlayFactory(total_accents=3)
+        ReservationFactory.create_batch(3, play=cls.play)
+        ReservationFactory.create_batch(2, play=cls.other_play)
+        SeatHold.objects.hold(AttendeeFactory(), cls.other_play)
+
+    def test_get_returns_per_play_and_overall_totals(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/dashboard/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = response.json()
+        self.assertDictEqual(data['totals'], {
+            'plays': 3,
+            'total_accents': 18,
+            'reserved_accents': 5,
+            'held_accents': 1,
+            'available_accents': 12,
+            'revenue': 79.97,
+            'total_fee': 10.13,
+        })
+        self.assertDictEqual(data['plays'][0], {
+            'uuid': str(self.play.uuid),
+            'name': self.play.name,
+            'total_accents': 10,
+            'reserved_accents': 3,
+            'held_accents': 0,
+            'available_accents': 7,
+            'revenue': 59.97,
+            'total_fee': 8.13,
+        })
+        self.assertEqual([row['uuid'] for row in data['plays']],
+                         [str(play.uuid) for play in (self.play, self.other_play, self.empty_play)])
+
+    def test_query_count_does_not_grow_with_the_plays(self):
+        PlayFactory.create_batch(20)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/dashboard/')
+
+        self.assertEqual(response.json()['totals']['plays'], 23)
+
+    def test_get_filters_by_plays(self):
+        play_uuids = '{},{}'.format(self.other_play.uuid, self.empty_play.uuid)
+        response = self.client.get('/api/dashboard/', {'plays': play_uuids})
+
+        data = response.json()
+        self.assertEqual(data['totals']['plays'], 2)
+        self.assertEqual(data['totals']['reserved_accents'], 2)
+        self.assertEqual(data['totals']['revenue'], 20.)
+        self.assertEqual([row['uuid'] for row in data['plays']], [str(self.other_play.uuid), str(self.empty_play.uuid)])
+
+    def test_get_without_matching_plays_returns_zero_totals(self):
+        response = self.client.get('/api/dashboard/', {'plays': str(uuid4())})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['totals'], {
+            'plays': 0,
+            'total_accents': 0,
+            'reserved_accents': 0,
+            'held_accents': 0,
+            'available_accents': 0,
+            'revenue': 0.,
+            'total_fee': 0.,
+        })
+        self.assertEqual(response.json()['plays'], [])
+
+    def test_get_rejects_invalid_play_uuids(self):
+        response = self.client.get('/api/dashboard/', {'plays': 'nope'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('plays', response.json())
+
+
+class PlaySeatMapViewTestCase(TestCase):
+    def test_get_returns_a_bitmap_with_the_taken_seats(self):
+        play = PlayFactory(total_accents=10)
+        ReservationFactory(play=play, seat=0)
+        ReservationFactory(play=play, seat=3)
+        ReservationFactory(play=play, seat=9)
+        ReservationFactory(seat=1)
+        SeatHold.objects.hold(AttendeeFactory(), play)
+
+        response = self.client.get('/api/plays/' + str(play.uuid) + '/seats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        seat_map_data = response.json()
+        self.assertEqual(seat_map_data['total_accents'], 10)
+        self.assertEqual(seat_map_data['reserved_accents'], 3)
+        self.assertEqual(seat_map_data['held_accents'], 1)
+        self.assertEqual(seat_map_data['available_accents'], 6)
+        self.assertEqual(b64decode(seat_map_data['seats']), bytes([0b10010000, 0b01000000]))
+
+    def test_a_thousand_seats_fit_in_125_bytes(self):
+        play = PlayFactory(total_accents=1000)
+
+        response = self.client.get('/api/plays/' + str(play.uuid) + '/seats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(b64decode(response.json()['seats']), bytes(125))
+
 
 class ReservationDetailViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.noisy_reservation = ReservationFactory()
+        cls.reservation = ReservationFactory()
+        cls.reservation_detail_url = '/api/reservations/' + str(cls.reservation.uuid) + '/'
+
     def setUp(self):
-        self.noisy_reservation = ReservationFactory()
-        self.reservation = ReservationFactory()
-        self.reservation_detail_url = '/api/reservations/' + str(self.reservation.uuid) + '/'
+        reset_token_buckets()
+        super().setUp()
 
     def test_get_returns_specified_reservation_data(self):
         response = self.client.get(self.reservation_detail_url)
@@ -225,6 +541,7 @@ class ReservationDetailViewTestCase(TestCase):
             'uuid': str(self.reservation.uuid),
             'play': str(self.reservation.play.uuid),
             'attendee': str(self.reservation.attendee.uuid),
+            'seat': self.reservation.seat,
         }
 
         self.assertEqual(expected_reservation_data, actual_reservation_data)
@@ -253,6 +570,7 @@ class ReservationDetailViewTestCase(TestCase):
 class ReservationListViewTestCase(TestCase):
     def setUp(self):
         self.reservations_list_url = '/api/reservations/'
+        reset_token_buckets()
         super().setUp()
 
     def test_get_returns_all_reservations(self):
@@ -270,11 +588,13 @@ class ReservationListViewTestCase(TestCase):
                 'uuid': str(play_1_reservation.uuid),
                 'play': str(play_1.uuid),
                 'attendee': str(attendee_for_plays_1_2.uuid),
+                'seat': play_1_reservation.seat,
             },
             {
                 'uuid': str(play_2_reservation.uuid),
                 'play': str(play_2.uuid),
                 'attendee': str(attendee_for_plays_1_2.uuid),
+                'seat': play_2_reservation.seat,
             }
         ]
 
@@ -286,6 +606,7 @@ class ReservationListViewTestCase(TestCase):
                 'uuid': str(play_1_reservation.uuid),
                 'play': str(play_1.uuid),
                 'attendee': str(attendee_for_play_1.uuid),
+                'seat': play_1_reservation.seat,
             }
         ]
 
@@ -297,6 +618,7 @@ class ReservationListViewTestCase(TestCase):
                 'uuid': str(play_2_reservation.uuid),
                 'play': str(play_2.uuid),
                 'attendee': str(attendee_for_play_2.uuid),
+                'seat': play_2_reservation.seat,
             }
         ]
 
@@ -306,10 +628,62 @@ class ReservationListViewTestCase(TestCase):
         response = self.client.get(self.reservations_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        actual_reservations_data = response.json()
+        actual_reservations_data = response.json()['results']
 
         self.assertListEqual(expected_reservations_data, actual_reservations_data)
 
+    def test_get_paginates_reservations_with_a_cursor(self):
+        reservations = [ReservationFactory() for _ in range(5)]
+
+        response = self.client.get(self.reservations_list_url, data={'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        paginated_uuids = []
+
+        while True:
+            page = response.json()
+            self.assertLessEqual(len(page['results']), 2)
+            paginated_uuids += [reservation_data['uuid'] for reservation_data in page['results']]
+
+            if page['next'] is None:
+                break
+
+            response = self.client.get(page['next'])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        expected_uuids = [str(reservation.uuid) for reservation in reservations]
+        self.assertListEqual(expected_uuids, paginated_uuids)
+
+    def test_get_filters_by_play_and_attendee(self):
+        play = PlayFactory()
+        attendee = AttendeeFactory()
+        play_reservations = ReservationFactory.create_batch(2, play=play)
+        attendee_reservation = ReservationFactory(play=play, attendee=attendee)
+        ReservationFactory(attendee=attendee)
+        ReservationFactory()
+
+        response = self.client.get(self.reservations_list_url, data={'play': str(play.uuid)})
+        self.assertListEqual([reservation['uuid'] for reservation in response.json()['results']],
+                             [str(reservation.uuid) for reservation in play_reservations + [attendee_reservation]])
+
+        response = self.client.get(self.reservations_list_url,
+                                   data={'play': str(play.uuid), 'attendee': str(attendee.uuid)})
+        self.assertListEqual([reservation['uuid'] for reservation in response.json()['results']],
+                             [str(attendee_reservation.uuid)])
+
+        response = self.client.get(self.reservations_list_url, data={'play': 'not-an-uuid'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_returns_only_the_requested_fields(self):
+        reservation = ReservationFactory()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.reservations_list_url, data={'fields': 'play,seat'})
+
+        self.assertListEqual(response.json()['results'], [{'play': str(reservation.play_id), 'seat': reservation.seat}])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"attendee_id"', queries[0]['sql'])
+
     def test_post_returns_201_and_creates_attendee_reservation_for_play(self):
         play = PlayFactory()
         attendee = AttendeeFactory()
@@ -352,3 +726,470 @@ class ReservationListViewTestCase(TestCase):
         actual_play_reservations_count = play.reservations.count()
 
         self.assertEqual(expected_play_reservations_count, actual_play_reservations_count)
+
+    def test_post_returns_201_and_reserves_the_chosen_seat(self):
+        play = PlayFactory()
+        reservation_data = {
+            'attendee': str(AttendeeFactory().uuid),
+            'play': str(play.uuid),
+            'seat': 7,
+        }
+
+        response = self.client.post(self.reservations_list_url, data=reservation_data, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['seat'], 7)
+
+        self.assertTrue(Reservation.objects.filter(play=play, seat=7).exists())
+
+    def test_post_returns_400_when_seat_is_taken_or_out_of_the_play(self):
+        reservation = ReservationFactory()
+        play = reservation.play
+
+        for seat in (reservation.seat, play.total_accents):
+            reservation_data = {
+                'attendee': str(AttendeeFactory().uuid),
+                'play': str(play.uuid),
+                'seat': seat,
+            }
+
+            response = self.client.post(
+                self.reservations_list_url, data=reservation_data, content_type='application/json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(play.reservations.count(), 1)
+
+    def test_post_returns_400_when_play_is_sold_out(self):
+        play = PlayFactory(total_accents=1)
+        ReservationFactory(play=play)
+
+        reservation_data = {
+            'attendee': str(AttendeeFactory().uuid),
+            'play': str(play.uuid),
+        }
+
+        response = self.client.post(self.reservations_list_url, data=reservation_data, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('play', response.json())
+
+        self.assertEqual(play.reservations.count(), 1)
+
+
+class ReservationBulkCreateViewTestCase(TestCase):
+    def setUp(self):
+        self.reservations_bulk_url = '/api/reservations/bulk/'
+        reset_token_buckets()
+        super().setUp()
+
+    def post_pairs(self, pairs):
+        reservations_data = [{'attendee': str(attendee.uuid), 'play': str(play.uuid)} for attendee, play in pairs]
+        return self.client.post(self.reservations_bulk_url, data=reservations_data, content_type='application/json')
+
+    def test_post_returns_201_and_creates_every_reservation(self):
+        play = PlayFactory()
+        attendees = [AttendeeFactory() for _ in range(3)]
+
+        response = self.post_pairs([(attendee, play) for attendee in attendees])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        for seat, (attendee, result) in enumerate(zip(attendees, response.json())):
+            self.assertEqual(result['status'], status.HTTP_201_CREATED)
+            self.assertEqual(result['data']['seat'], seat)
+            self.assertEqual(result['data']['attendee'], str(attendee.uuid))
+            self.assertEqual(result['data']['play'], str(play.uuid))
+            self.assertTrue(
+                Reservation.objects.filter(uuid=result['data']['uuid'], attendee=attendee, play=play).exists())
+
+    def test_post_query_count_does_not_grow_with_the_batch(self):
+        play = PlayFactory()
+        attendees = [AttendeeFactory() for _ in range(10)]
+        # Free seats are looked up after the first taken one from the second batch on
+        ReservationFactory(play=play)
+
+        with CaptureQueriesContext(connection) as small_batch_queries:
+            self.post_pairs([(attendee, play) for attendee in attendees[:2]])
+
+        with CaptureQueriesContext(connection) as large_batch_queries:
+            self.post_pairs([(attendee, play) for attendee in attendees[2:]])
+
+        self.assertEqual(len(small_batch_queries), len(large_batch_queries))
+
+    def test_post_returns_207_and_reports_failures_per_item(self):
+        reservation = ReservationFactory()
+        play = PlayFactory()
+        attendee = AttendeeFactory()
+
+        reservations_data = [
+            {'attendee': str(attendee.uuid), 'play': str(play.uuid)},
+            {'attendee': str(reservation.attendee.uuid), 'play': str(reservation.play.uuid)},
+            {'attendee': str(attendee.uuid), 'play': str(play.uuid)},
+            {'attendee': str(attendee.uuid), 'play': str(attendee.uuid)},
+            {'attendee': 'not an uuid', 'play': str(play.uuid)},
+        ]
+
+        response = self.client.post(self.reservations_bulk_url, data=reservations_data, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+
+        results = response.json()
+        self.assertListEqual([result['status'] for result in results], [201, 400, 400, 400, 400])
+        self.assertIn('non_field_errors', results[1]['errors'])
+        self.assertIn('non_field_errors', results[2]['errors'])
+        self.assertIn('play', results[3]['errors'])
+        self.assertIn('attendee', results[4]['errors'])
+
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_post_books_only_the_available_accents(self):
+        play = PlayFactory(total_accents=2)
+        attendees = [AttendeeFactory() for _ in range(3)]
+
+        response = self.post_pairs([(attendee, play) for attendee in attendees])
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+
+        results = response.json()
+        self.assertListEqual([result['status'] for result in results], [201, 201, 400])
+        self.assertIn('play', results[2]['errors'])
+
+        play.refresh_from_db()
+        self.assertEqual(play.reserved_accents, 2)
+        self.assertEqual(play.reservations.count(), 2)
+
+    def test_post_assigns_the_seats_asked_for_before_the_first_free_ones(self):
+        play = PlayFactory(total_accents=3)
+        first_attendee, second_attendee = AttendeeFactory.create_batch(2)
+
+        reservations_data = [
+            {'attendee': str(first_attendee.uuid), 'play': str(play.uuid)},
+            {'attendee': str(second_attendee.uuid), 'play': str(play.uuid), 'seat': 0},
+        ]
+
+        response = self.client.post(self.reservations_bulk_url, data=reservations_data, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([result['data']['seat'] for result in response.json()], [1, 0])
+
+    def test_post_returns_400_when_payload_is_not_a_list(self):
+        response = self.client.post(self.reservations_bulk_url, data={}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SeatHoldViewsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.play = PlayFactory(total_accents=2)
+        cls.attendee = AttendeeFactory()
+
+    def setUp(self):
+        reset_token_buckets()
+        super().setUp()
+
+    def test_post_holds_an_accent(self):
+        response = self.client.post('/api/holds/', {'attendee': str(self.attendee.uuid), 'play': str(self.play.uuid)})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        hold = SeatHold.objects.get()
+        self.assertEqual(response.json()['uuid'], str(hold.uuid))
+
+        response = self.client.get('/api/plays/{}/'.format(self.play.uuid))
+        self.assertEqual(response.json()['amount_of_available_accents'], 1)
+
+    def test_post_takes_an_expired_hold_again(self):
+        SeatHold.objects.hold(self.attendee, self.play, duration=timedelta(0))
+
+        response = self.client.post('/api/holds/', {'attendee': str(self.attendee.uuid), 'play': str(self.play.uuid)})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['uuid'], str(SeatHold.objects.get().uuid))
+
+        response = self.client.get('/api/plays/{}/'.format(self.play.uuid))
+        self.assertEqual(response.json()['amount_of_available_accents'], 1)
+
+    def test_post_refuses_a_second_hold_on_the_play(self):
+        SeatHold.objects.hold(self.attendee, self.play)
+
+        response = self.client.post('/api/holds/', {'attendee': str(self.attendee.uuid), 'play': str(self.play.uuid)})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'non_field_errors': ['The fields attendee, play must make a unique set.']})
+
+    def test_post_refuses_a_sold_out_play(self):
+        ReservationFactory.create_batch(2, play=self.play)
+
+        response = self.client.post('/api/holds/', {'attendee': str(self.attendee.uuid), 'play': str(self.play.uuid)})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'play': ['This play is sold out.']})
+
+    def test_post_refuses_an_attendee_with_a_reservation(self):
+        ReservationFactory(attendee=self.attendee, play=self.play)
+
+        response = self.client.post('/api/holds/', {'attendee': str(self.attendee.uuid), 'play': str(self.play.uuid)})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_confirm_returns_the_reservation(self):
+        hold = SeatHold.objects.hold(self.attendee, self.play)
+
+        response = self.client.post('/api/holds/{}/confirm/'.format(hold.uuid), {'seat': 1})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        reservation = Reservation.objects.get()
+        self.assertEqual(response.json(), {
+            'uuid': str(reservation.uuid), 'attendee': str(self.attendee.uuid), 'play': str(self.play.uuid), 'seat': 1})
+
+    def test_confirm_rejects_a_taken_seat(self):
+        ReservationFactory(play=self.play, seat=0)
+        hold = SeatHold.objects.hold(self.attendee, self.play)
+
+        response = self.client.post('/api/holds/{}/confirm/'.format(hold.uuid), {'seat': 0})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('seat', response.json())
+
+    def test_confirm_returns_410_for_an_expired_hold(self):
+        hold = SeatHold.objects.hold(self.attendee, self.play, duration=timedelta(0))
+
+        response = self.client.post('/api/holds/{}/confirm/'.format(hold.uuid))
+
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_delete_releases_the_accent(self):
+        hold = SeatHold.objects.hold(self.attendee, self.play)
+
+        response = self.client.delete('/api/holds/{}/'.format(hold.uuid))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.play.refresh_from_db()
+        self.assertEqual(self.play.held_accents, 0)
+
+
+class IdempotencyKeyTestCase(TestCase):
+    def setUp(self):
+        caches[IDEMPOTENCY_CACHE_ALIAS].clear()
+        reset_token_buckets()
+        self.play = PlayFactory()
+        self.attendee = AttendeeFactory()
+        self.reservation_data = {'attendee': str(self.attendee.uuid), 'play': str(self.play.uuid)}
+        super().setUp()
+
+    def post(self, url, data, key):
+        return self.client.post(url, data=data, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retried_reservation_replays_the_first_response_without_queries(self):
+        response = self.post('/api/reservations/', self.reservation_data, 'booking-1')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            retried_response = self.post('/api/reservations/', self.reservation_data, 'booking-1')
+
+        self.assertEqual(retried_response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retried_response['Idempotent-Replayed'], 'true')
+        self.assertEqual(retried_response.json(), response.json())
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_stored_responses_outlive_a_burst_of_cached_plays(self):
+        self.post('/api/reservations/', self.reservation_data, 'booking-1')
+
+        play_cache = caches[PLAY_CACHE_ALIAS]
+        play_cache.set_many({'plays:filler:{}'.format(index): index for index in range(1000)})
+
+        retried_response = self.post('/api/reservations/', self.reservation_data, 'booking-1')
+        self.assertEqual(retried_response['Idempotent-Replayed'], 'true')
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_retried_signup_neither_hashes_nor_creates_another_attendee(self):
+        attendee_data = {'username': 'JuãoPáulu', 'email': 'juao.paulu@host.com', 'password': 'xoriugui'}
+        response = self.post('/api/attendees/', attendee_data, 'signup-1')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with mock.patch('plays.serializers.hash_password') as hash_password:
+            retried_response = self.post('/api/attendees/', attendee_data, 'signup-1')
+
+        hash_password.assert_not_called()
+        self.assertEqual(retried_response.json(), response.json())
+        self.assertEqual(Attendee.objects.filter(user__username='JuãoPáulu').count(), 1)
+
+    def test_validation_errors_are_replayed_too(self):
+        ReservationFactory(attendee=self.attendee, play=self.play)
+
+        response = self.post('/api/reservations/', self.reservation_data, 'booking-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        retried_response = self.post('/api/reservations/', self.reservation_data, 'booking-1')
+        self.assertEqual(retried_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(retried_response['Idempotent-Replayed'], 'true')
+
+    def test_reusing_a_key_with_another_body_is_rejected(self):
+        self.post('/api/reservations/', self.reservation_data, 'booking-1')
+
+        response = self.post('/api/reservations/', dict(self.reservation_data, seat=3), 'booking-1')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_retry_while_the_first_request_runs_is_a_conflict(self):
+        fingerprint = sha256(json.dumps(self.reservation_data).encode()).hexdigest()
+        caches[IDEMPOTENCY_CACHE_ALIAS].add(idempotency_key('/api/reservations/', 'booking-1'),
+                                            {'fingerprint': fingerprint})
+
+        response = self.post('/api/reservations/', self.reservation_data, 'booking-1')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_failed_requests_are_not_replayed(self):
+        with mock.patch('plays.views.ReservationListView.create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.post('/api/reservations/', self.reservation_data, 'booking-1')
+
+        response = self.post('/api/reservations/', self.reservation_data, 'booking-1')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+
+    def test_keys_are_scoped_to_the_endpoint(self):
+        self.post('/api/reservations/', self.reservation_data, 'same-key')
+
+        response = self.post('/api/reservations/bulk/', [self.reservation_data], 'same-key')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+
+    def test_requests_without_a_key_are_not_stored(self):
+        self.client.post('/api/reservations/', data=self.reservation_data, content_type='application/json')
+
+        response = self.client.post('/api/reservations/', data=self.reservation_data, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ReservationExportViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reservations_export_url = '/api/exports/reservations/'
+        cls.reservations = [ReservationFactory(), ReservationFactory()]
+        cls.expected_rows = [
+            {
+                'uuid': str(reservation.uuid),
+                'attendee': str(reservation.attendee.uuid),
+                'play': str(reservation.play.uuid),
+                'seat': reservation.seat,
+                'created_at': reservation.created_at.isoformat(),
+            }
+            for reservation in cls.reservations
+        ]
+
+    def test_get_streams_reservations_as_ndjson_by_default(self):
+        response = self.client.get(self.reservations_export_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        actual_rows = [json.loads(line) for line in lines]
+
+        self.assertListEqual(self.expected_rows, actual_rows)
+
+    def test_get_streams_reservations_as_csv(self):
+        response = self.client.get(self.reservations_export_url, data={'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        actual_rows = list(csv.DictReader(lines))
+        expected_rows = [{field: str(value) for field, value in row.items()} for row in self.expected_rows]
+
+        self.assertListEqual(expected_rows, actual_rows)
+
+    def test_get_returns_400_for_unknown_format(self):
+        response = self.client.get(self.reservations_export_url, data={'format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PlayFinancialExportViewTestCase(TestCase):
+    def test_get_streams_financials_of_every_play(self):
+        play = PlayFactory()
+        play_without_reservations = PlayFactory()
+        ReservationFactory(play=play)
+        ReservationFactory(play=play)
+        play.refresh_from_db()
+
+        response = self.client.get('/api/exports/plays/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        actual_rows = [json.loads(line) for line in lines]
+
+        expected_rows = [
+            {
+                'uuid': str(exported_play.uuid),
+                'name': exported_play.name,
+                'fee': float(exported_play.fee),
+                'price': float(exported_play.price),
+                'total_accents': exported_play.total_accents,
+                'amount_of_reserved_accents': exported_play.amount_of_reserved_accents,
+                'amount_of_available_accents': exported_play.amount_of_available_accents,
+                'revenue': float(exported_play.revenue),
+                'total_fee': float(exported_play.total_fee),
+            }
+            for exported_play in (play, play_without_reservations)
+        ]
+
+        self.assertListEqual(expected_rows, actual_rows)
+
+
+class AsyncPlayViewsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.plays = PlayFactory.create_batch(3)
+
+    def setUp(self):
+        caches[PLAY_CACHE_ALIAS].clear()
+        reset_token_buckets()
+        super().setUp()
+
+    def test_list_matches_the_sync_view(self):
+        for query in ({}, {'page_size': 2}, {'name': self.plays[1].name}, {'available': 'false'}):
+            sync_response = self.client.get('/api/plays/', query)
+            async_response = self.client.get('/api/async/plays/', query)
+
+            self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+            self.assertEqual(async_response['Content-Type'], 'application/json')
+            self.assertEqual(async_response.content.replace(b'/async', b''), sync_response.content)
+
+    def test_list_rejects_invalid_filters_like_the_sync_view(self):
+        sync_response = self.client.get('/api/plays/', {'available': 'maybe'})
+        async_response = self.client.get('/api/async/plays/', {'available': 'maybe'})
+
+        self.assertEqual(async_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(async_response.content, sync_response.content)
+
+    def test_list_rejects_invalid_cursors(self):
+        response = self.client.get('/api/async/plays/', {'cursor': 'nope'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detail_matches_the_sync_view(self):
+        play = self.plays[0]
+
+        sync_response = self.client.get('/api/plays/{}/'.format(play.uuid))
+        async_response = self.client.get('/api/async/plays/{}/'.format(play.uuid))
+
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_response.content, sync_response.content)
+        self.assertEqual(async_response['ETag'], sync_response['ETag'])
+
+    def test_detail_returns_304_when_etag_matches(self):
+        play = self.plays[0]
+        etag = self.client.get('/api/async/plays/{}/'.format(play.uuid))['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/async/plays/{}/'.format(play.uuid), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_detail_of_unknown_play_is_not_found(self):
+        response = self.client.get('/api/async/plays/{}/'.format(uuid4()))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_list_is_served_through_the_asgi_handler(self):
+        response = await self.async_client.get('/api/async/plays/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['results']), 3)
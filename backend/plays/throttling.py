@@ -0,0 +1,159 @@
+import time
+from threading import BoundedSemaphore, Lock
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBuckets:
+    # A bucket of capacity tokens per key, refilled at refill_rate tokens a second. Buckets are kept least recently used
+    # first: a bucket left alone long enough to refill is the same as a new one and is dropped, and past max_keys the
+    # least recently used go too.
+    def __init__(self, capacity, refill_rate, max_keys):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.max_keys = max_keys
+        self.buckets = {}
+        self.lock = Lock()
+
+    def take(self, key, now=None):
+        # Takes a token, returning 0, or the seconds until the bucket has one
+        now = time.monotonic() if now is None else now
+
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.
+            else:
+                wait = (1 - tokens) / self.refill_rate
+
+            self.buckets[key] = (tokens, now)
+            self.evict(now)
+
+        return wait
+
+    def evict(self, now):
+        refill_seconds = self.capacity / self.refill_rate
+
+        while self.buckets:
+            key, (_, updated) = next(iter(self.buckets.items()))
+
+            if len(self.buckets) <= self.max_keys and now - updated < refill_seconds:
+                return
+
+            del self.buckets[key]
+
+    def __len__(self):
+        return len(self.buckets)
+
+
+_buckets = {}
+_buckets_lock = Lock()
+
+
+def get_token_buckets(scope, capacity, refill_rate):
+    with _buckets_lock:
+        if scope not in _buckets:
+            _buckets[scope] = TokenBuckets(capacity, refill_rate, settings.THROTTLE_MAX_CLIENTS)
+
+        return _buckets[scope]
+
+
+def reset_token_buckets():
+    with _buckets_lock:
+        _buckets.clear()
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    # Rates of REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] per the view's throttle_scope, like ScopedRateThrottle, but
+    # allowing a burst of the whole rate and held in memory by the process instead of a list of timestamps in the
+    # cache. Requests are counted against the client address: the attendee of a request body is whatever the client
+    # claims, keying on it would hand out a fresh bucket per made up uuid, or drain someone else's.
+    def __init__(self):
+        pass
+
+    def allow_request(self, request, view):
+        return self.allow_scope(request, getattr(view, 'throttle_scope', None))
+
+    def allow_scope(self, request, scope):
+        # Also takes plain Django requests, for the views outside DRF
+        self.scope = scope
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope) if self.scope else None
+
+        if rate is None:
+            return True
+
+        num_requests, duration = self.parse_rate(rate)
+        buckets = get_token_buckets(self.scope, num_requests, num_requests / duration)
+        self.wait_seconds = buckets.take(self.get_ident(request))
+
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class WritesSaturated(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many writes at once, try again later.'
+    default_code = 'writes_saturated'
+    # Sent as the Retry-After header by DRF's exception handler
+    wait = 1
+
+
+_write_slots = None
+_write_slots_lock = Lock()
+
+
+def get_write_slots():
+    global _write_slots
+
+    with _write_slots_lock:
+        if _write_slots is None and settings.WRITE_ADMISSION_LIMIT:
+            _write_slots = BoundedSemaphore(settings.WRITE_ADMISSION_LIMIT)
+
+        return _write_slots
+
+
+def reset_write_slots():
+    global _write_slots
+
+    with _write_slots_lock:
+        _write_slots = None
+
+
+class WriteAdmissionMixin:
+    # Writes run holding one of WRITE_ADMISSION_LIMIT slots, so at most that many queue on the database write lock.
+    # A write that waits WRITE_ADMISSION_TIMEOUT seconds for a slot gets a 503 instead of a seat at the back of the
+    # queue. Throttles run first: rate limited clients never take a slot.
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if request.method in SAFE_METHODS:
+            return
+
+        write_slots = get_write_slots()
+
+        if write_slots is None:
+            return
+
+        if not write_slots.acquire(timeout=settings.WRITE_ADMISSION_TIMEOUT):
+            raise WritesSaturated()
+
+        self.write_slots = write_slots
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        write_slots = getattr(self, 'write_slots', None)
+
+        if write_slots is not None:
+            self.write_slots = None
+            write_slots.release()
+
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,7 +1,10 @@
 from django.urls import path
 
 from .views import (
-    AttendeeDetailView, AttendeeListView, PlayDetailView, PlayListView, ReservationDetailView, ReservationListView
+    AttendeeDetailView, AttendeeListView, BoxOfficeView, FinancialSummaryView, MetricsView, PlayDetailView,
+    PlayEventsView, PlayFinancialExportView, PlayListView, PlaySeatMapView, ReservationBulkCreateView,
+    ReservationDetailView, ReservationExportView, ReservationListView, SeatHoldConfirmView, SeatHoldCreateView,
+    SeatHoldDetailView, play_detail_async, play_list_async
 )
 
 
@@ -18,9 +21,48 @@ urlpatterns = [
     path('plays/<uuid:pk>/', PlayDetailView.as_view(),
          name='play-detail'),
 
+    path('async/plays/', play_list_async,
+         name='play-list-async'),
+
+    path('async/plays/<uuid:pk>/', play_detail_async,
+         name='play-detail-async'),
+
+    path('plays/<uuid:pk>/seats/', PlaySeatMapView.as_view(),
+         name='play-seat-map'),
+
+    path('plays/<uuid:pk>/events/', PlayEventsView.as_view(),
+         name='play-events'),
+
     path('reservations/', ReservationListView.as_view(),
          name='reservation-list'),
 
+    path('reservations/bulk/', ReservationBulkCreateView.as_view(),
+         name='reservation-bulk'),
+
     path('reservations/<uuid:pk>/', ReservationDetailView.as_view(),
          name='reservation-detail'),
+
+    path('holds/', SeatHoldCreateView.as_view(),
+         name='seat-hold-list'),
+
+    path('holds/<uuid:pk>/', SeatHoldDetailView.as_view(),
+         name='seat-hold-detail'),
+
+    path('holds/<uuid:pk>/confirm/', SeatHoldConfirmView.as_view(),
+         name='seat-hold-confirm'),
+
+    path('financials/', FinancialSummaryView.as_view(),
+         name='financial-summary'),
+
+    path('dashboard/', BoxOfficeView.as_view(),
+         name='box-office'),
+
+    path('exports/plays/', PlayFinancialExportView.as_view(),
+         name='play-financial-export'),
+
+    path('exports/reservations/', ReservationExportView.as_view(),
+         name='reservation-export'),
+
+    path('metrics/', MetricsView.as_view(),
+         name='metrics'),
 ]
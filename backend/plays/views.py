@@ -1,36 +1,394 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.http import parse_etags
+from django.views import View
+from django.db.utils import IntegrityError
+from rest_framework import status
 from rest_framework.generics import (
-    ListCreateAPIView, RetrieveAPIView, RetrieveUpdateDestroyAPIView, RetrieveDestroyAPIView
+    CreateAPIView, ListCreateAPIView, RetrieveAPIView, RetrieveUpdateDestroyAPIView, RetrieveDestroyAPIView
 )
+from rest_framework.exceptions import NotFound, Throttled, ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from .models import Attendee, Play, Reservation
-from .serializers import AttendeeSerializer, PlaySerializer, PlayFinancialDetailSerializer, ReservationSerializer
+from .cache import get_or_cache_play_financials
+from .events import KEEPALIVE, Subscription, format_event, get_broker, play_channel
+from .exports import (
+    EXPORT_FORMATS, PLAY_FINANCIAL_EXPORT_FIELDS, RESERVATION_EXPORT_FIELDS, play_financial_rows, reservation_rows
+)
+from .filters import PlayFilter, QueryParamsFilterBackend, ReservationFilter
+from .hashers import PasswordHashingBusy
+from .idempotency import IdempotentCreateMixin
+from .metrics import registry
+from .models import Attendee, Play, PlaySoldOut, Reservation, SeatHold, SeatHoldExpired
+from .pagination import CreationCursorPagination
+from .renderers import FastJSONRenderer
+from .serializers import (
+    AttendeeSerializer, BoxOfficeFilterSerializer, PlaySeatMapSerializer, PlaySerializer, PlayFinancialDetailSerializer,
+    PlayValuesSerializer, ReservationBulkItemSerializer, ReservationSerializer, ReservationValuesSerializer,
+    SeatHoldConfirmSerializer, SeatHoldSerializer
+)
+from .settings import BULK_RESERVATION_MAX_ITEMS, PLAY_EVENTS_HEARTBEAT
+from .throttling import TokenBucketThrottle, WriteAdmissionMixin
+
+
+def etag_matches(request, etag):
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    return etag in if_none_match or '*' in if_none_match
+
+
+def get_sparse_fields(query_params, values_serializer_class):
+    # ?fields=uuid,name answers only those fields, and only their columns are read
+    if 'fields' not in query_params:
+        return None
+
+    fields = [field for field in query_params['fields'].split(',') if field]
+    unknown_fields = [field for field in fields if field not in values_serializer_class.fields]
+
+    if not fields or unknown_fields:
+        raise ValidationError({'fields': ['Unknown field(s): {}.'.format(', '.join(unknown_fields) or '(none)')]})
+
+    return fields
+
+
+def list_page_values(paginator, request, queryset, values_serializer_class):
+    values_serializer = values_serializer_class(fields=get_sparse_fields(request.query_params, values_serializer_class))
+
+    # The cursor reads its position from the ordering columns of the page's rows
+    columns = dict.fromkeys(values_serializer.columns + list(paginator.ordering))
+    page = paginator.paginate_queryset(queryset.values(*columns), request)
+
+    return paginator.get_paginated_response(values_serializer.to_representation(page))
 
 
-class AttendeeListView(ListCreateAPIView):
+class ValuesListMixin:
+    # Lists pages of .values() rows through values_serializer_class, rather than model instances through
+    # serializer_class: same output, without building a model instance and field objects per row
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        return list_page_values(self.paginator, request, self.filter_queryset(self.get_queryset()),
+                                self.values_serializer_class)
+
+
+class AttendeeListView(IdempotentCreateMixin, ListCreateAPIView):
     serializer_class = AttendeeSerializer
-    queryset = Attendee.objects.all()
+    queryset = Attendee.objects.select_related('user')
+    pagination_class = CreationCursorPagination
+
+    def create(self, request, *args, **kwargs):
+        try:
+            return super().create(request, *args, **kwargs)
+        except PasswordHashingBusy:
+            return Response({'detail': 'Too many signups at once, try again later.'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
 
 
 class AttendeeDetailView(RetrieveAPIView):
     serializer_class = AttendeeSerializer
-    queryset = Attendee.objects.all()
+    queryset = Attendee.objects.select_related('user')
 
 
-class PlayListView(ListCreateAPIView):
+class PlayListView(ValuesListMixin, ListCreateAPIView):
     serializer_class = PlaySerializer
+    values_serializer_class = PlayValuesSerializer
     queryset = Play.objects.all()
+    pagination_class = CreationCursorPagination
+    filter_backends = (QueryParamsFilterBackend, )
+    filter_class = PlayFilter
 
 
-class PlayDetailView(RetrieveUpdateDestroyAPIView):
+class PlayDetailView(WriteAdmissionMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = PlayFinancialDetailSerializer
     queryset = Play.objects.all()
+    throttle_scope = 'plays'
+
+    def retrieve(self, request, *args, **kwargs):
+        data, etag = get_or_cache_play_financials(kwargs['pk'], lambda: self.get_serializer(self.get_object()).data)
+
+        # Unchanged pollers get a 304 straight from the cache, without a query nor a serialization
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        return Response(data, headers={'ETag': etag})
+
+
+class FinancialSummaryView(APIView):
+    def get(self, request):
+        # A single aggregate query over every play, summed in integer cents by the database
+        return Response(Play.objects.financial_summary())
+
+
+class BoxOfficeView(APIView):
+    # ?plays=<uuid>,<uuid> narrows the dashboard to those plays, looked up by primary key
+    def get(self, request):
+        play_uuids = [uuid for value in request.query_params.getlist('plays') for uuid in value.split(',') if uuid]
+
+        filters = BoxOfficeFilterSerializer(data={'plays': play_uuids} if play_uuids else {})
+        filters.is_valid(raise_exception=True)
+
+        plays = Play.objects.all()
+        if 'plays' in filters.validated_data:
+            plays = plays.filter(uuid__in=filters.validated_data['plays'])
+
+        return Response(plays.box_office())
+
+
+class PlaySeatMapView(RetrieveAPIView):
+    serializer_class = PlaySeatMapSerializer
+    queryset = Play.objects.all()
+
+
+EVENT_STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+def load_play_snapshot(play_uuid):
+    return PlaySeatMapSerializer(Play.objects.get(uuid=play_uuid)).data
+
+
+class PlayEventsView(View):
+    # Server-sent events: a snapshot of the play, then an event per reservation change. This holds a thread per client,
+    # under ASGI the stream is served from the event loop by plays.asgi.PlayEventsRouter instead.
+    def get(self, request, pk):
+        if not Play.objects.filter(uuid=pk).exists():
+            return render_json({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+
+        response = StreamingHttpResponse(self.stream(pk), content_type='text/event-stream')
+
+        for header, value in EVENT_STREAM_HEADERS.items():
+            response[header] = value
+
+        return response
 
+    def stream(self, play_uuid):
+        broker = get_broker()
+        channel = play_channel(play_uuid)
+        subscription = Subscription()
 
-class ReservationListView(ListCreateAPIView):
+        # Subscribed before reading the snapshot, so no change falls in between
+        broker.subscribe(channel, subscription)
+
+        try:
+            yield format_event('snapshot', load_play_snapshot(play_uuid))
+
+            while not subscription.overflowed:
+                event = subscription.get(timeout=PLAY_EVENTS_HEARTBEAT)
+                yield KEEPALIVE if event is None else format_event('availability', event)
+        finally:
+            broker.unsubscribe(channel, subscription)
+
+
+class ReservationListView(WriteAdmissionMixin, IdempotentCreateMixin, ValuesListMixin, ListCreateAPIView):
     serializer_class = ReservationSerializer
+    values_serializer_class = ReservationValuesSerializer
     queryset = Reservation.objects.all()
+    throttle_scope = 'reservations'
+    pagination_class = CreationCursorPagination
+    filter_backends = (QueryParamsFilterBackend, )
+    filter_class = ReservationFilter
 
 
-class ReservationDetailView(RetrieveDestroyAPIView):
+class ReservationDetailView(WriteAdmissionMixin, RetrieveDestroyAPIView):
     serializer_class = ReservationSerializer
     queryset = Reservation.objects.all()
+    throttle_scope = 'reservations'
+
+
+class ReservationBulkCreateView(WriteAdmissionMixin, IdempotentCreateMixin, CreateAPIView):
+    serializer_class = ReservationSerializer
+    queryset = Reservation.objects.all()
+    throttle_scope = 'reservations'
+
+    def create(self, request, *args, **kwargs):
+        items = request.data
+
+        if not isinstance(items, list) or not items:
+            return Response({'non_field_errors': ['Expected a non empty list of reservations.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if len(items) > BULK_RESERVATION_MAX_ITEMS:
+            return Response(
+                {'non_field_errors': ['Ensure this list has no more than {} reservations.'.format(
+                    BULK_RESERVATION_MAX_ITEMS)]},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(items)
+        bookings = []
+        booking_indexes = []
+
+        for index, item in enumerate(items):
+            item_serializer = ReservationBulkItemSerializer(data=item)
+
+            if not item_serializer.is_valid():
+                results[index] = {'status': status.HTTP_400_BAD_REQUEST, 'errors': item_serializer.errors}
+                continue
+
+            validated_data = item_serializer.validated_data
+            bookings.append((validated_data['attendee'], validated_data['play'], validated_data.get('seat')))
+            booking_indexes.append(index)
+
+        try:
+            reservations_or_errors = self.get_queryset().bulk_reserve(bookings)
+        except (IntegrityError, PlaySoldOut):
+            # A concurrent request took one of the pairs or the last accents after our lookups; nothing was written
+            return Response({'non_field_errors': ['Reservations changed concurrently, please retry.']},
+                            status=status.HTTP_409_CONFLICT)
+
+        for index, reservation_or_errors in zip(booking_indexes, reservations_or_errors):
+            if isinstance(reservation_or_errors, Reservation):
+                results[index] = {'status': status.HTTP_201_CREATED,
+                                  'data': self.get_serializer(reservation_or_errors).data}
+            else:
+                results[index] = {'status': status.HTTP_400_BAD_REQUEST, 'errors': reservation_or_errors}
+
+        if all(result['status'] == status.HTTP_201_CREATED for result in results):
+            return Response(results, status=status.HTTP_201_CREATED)
+
+        return Response(results, status=status.HTTP_207_MULTI_STATUS)
+
+
+class SeatHoldCreateView(WriteAdmissionMixin, IdempotentCreateMixin, CreateAPIView):
+    serializer_class = SeatHoldSerializer
+    queryset = SeatHold.objects.all()
+    throttle_scope = 'reservations'
+
+
+class SeatHoldDetailView(WriteAdmissionMixin, RetrieveDestroyAPIView):
+    serializer_class = SeatHoldSerializer
+    queryset = SeatHold.objects.all()
+    throttle_scope = 'reservations'
+
+    def perform_destroy(self, instance):
+        instance.release()
+
+
+class SeatHoldConfirmView(WriteAdmissionMixin, IdempotentCreateMixin, CreateAPIView):
+    serializer_class = SeatHoldConfirmSerializer
+    queryset = SeatHold.objects.select_related('play')
+    throttle_scope = 'reservations'
+
+    def create(self, request, *args, **kwargs):
+        hold = self.get_object()
+        serializer = self.get_serializer(hold, data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            reservation = hold.confirm(serializer.validated_data.get('seat'))
+        except SeatHoldExpired:
+            return Response({'detail': 'This seat hold expired or was used up by a reservation.'},
+                            status=status.HTTP_410_GONE)
+        except IntegrityError:
+            # The attendee or the seat was reserved concurrently; the hold was kept
+            return Response({'non_field_errors': ['Reservations changed concurrently, please retry.']},
+                            status=status.HTTP_409_CONFLICT)
+
+        return Response(ReservationSerializer(reservation).data, status=status.HTTP_201_CREATED)
+
+
+class ExportView(View):
+    # Plain Django view: rows are streamed straight from the cursor, without DRF serializers or renderers
+    filename = None
+    fields = None
+
+    def get_rows(self):
+        raise NotImplementedError
+
+    def get(self, request):
+        export_format = request.GET.get('format', 'ndjson')
+
+        if export_format not in EXPORT_FORMATS:
+            return HttpResponseBadRequest('Unsupported export format: ' + export_format)
+
+        content_type, render = EXPORT_FORMATS[export_format]
+
+        response = StreamingHttpResponse(render(self.fields, self.get_rows()), content_type=content_type)
+        response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(self.filename, export_format)
+        return response
+
+
+class ReservationExportView(ExportView):
+    filename = 'reservations'
+    fields = RESERVATION_EXPORT_FIELDS
+
+    def get_rows(self):
+        return reservation_rows()
+
+
+class PlayFinancialExportView(ExportView):
+    filename = 'play-financials'
+    fields = PLAY_FINANCIAL_EXPORT_FIELDS
+
+    def get_rows(self):
+        return play_financial_rows()
+
+
+class MetricsView(View):
+    def get(self, request):
+        return HttpResponse(registry.render_prometheus(), content_type='text/plain; version=0.0.4')
+
+
+# Async read paths, served without holding a thread under ASGI (backend/asgi.py). Django 3.2 has no async ORM:
+# queries run through sync_to_async(), on the thread Django keeps for sync code. The responses match the DRF views.
+
+def render_json(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(FastJSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+@sync_to_async
+def list_plays_page(request):
+    request = Request(request)
+    # Filtered like PlayListView, which the backend reads the filter_class of
+    plays = QueryParamsFilterBackend().filter_queryset(request, Play.objects.all(), PlayListView)
+    return list_page_values(CreationCursorPagination(), request, plays, PlayValuesSerializer).data
+
+
+@sync_to_async
+def load_play_financials(play_uuid):
+    return get_or_cache_play_financials(
+        play_uuid, lambda: PlayFinancialDetailSerializer(Play.objects.get(uuid=play_uuid)).data)
+
+
+async def play_list_async(request):
+    try:
+        data = await list_plays_page(request)
+    except NotFound as error:
+        return render_json({'detail': error.detail}, status.HTTP_404_NOT_FOUND)
+    except ValidationError as error:
+        return render_json(error.detail, status.HTTP_400_BAD_REQUEST)
+
+    return render_json(data)
+
+
+def throttled_response(request, scope):
+    # The response DRF gives a throttled request, or None when the request is allowed
+    throttle = TokenBucketThrottle()
+
+    if throttle.allow_scope(request, scope):
+        return None
+
+    error = Throttled(throttle.wait())
+    response = render_json({'detail': error.detail}, status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(error.wait)
+    return response
+
+
+async def play_detail_async(request, pk):
+    # The bucket of PlayDetailView: polling one path or the other, a client spends the same tokens
+    response = throttled_response(request, PlayDetailView.throttle_scope)
+
+    if response is not None:
+        return response
+
+    try:
+        data, etag = await load_play_financials(pk)
+    except Play.DoesNotExist:
+        return render_json({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+
+    if etag_matches(request, etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = render_json(data)
+
+    response['ETag'] = etag
+    return response